@@ -1,15 +1,71 @@
 import pygame as pg
 import moderngl
-import struct
+import numpy as np
 import time
 import json
 import base64
+import functools
+import hashlib
+import logging
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 # ==============================================================================
 # 1. Include the ShaderTranslator class from our previous work
 # ==============================================================================
-from wasmtime import Store, Module, Instance, Linker, Trap, Config, Engine, WasiConfig
+from wasmtime import Store, Module, Instance, Linker, Trap, Config, Engine, WasiConfig, WasmtimeError
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_engine() -> Engine:
+    """
+    One Engine per process, shared by every ShaderTranslator.
+
+    The Python bindings do not expose Wasmtime's pooling allocator, so a
+    shared engine is the closest equivalent: all instances reuse the same
+    compiled code pages and compilation cache instead of each paying full
+    engine setup.
+    """
+    config = Config()
+    config.wasm_exceptions = True
+    config.strategy = "cranelift"
+    config.cranelift_opt_level = "speed"
+    try:
+        config.cache = True
+    except WasmtimeError:
+        pass
+    return Engine(config)
+
+
+def _load_module(engine, wasm_path: str) -> Module:
+    """Load the wasm module, reusing an AOT-precompiled .cwasm sibling when possible."""
+    with open(wasm_path, 'rb') as f:
+        wasm_bytes = f.read()
+    digest = hashlib.blake2b(wasm_bytes, digest_size=16).hexdigest()
+    base, _ = os.path.splitext(wasm_path)
+    cwasm_path = f"{base}-{digest}.cwasm"
+    if os.path.isfile(cwasm_path):
+        try:
+            return Module.deserialize_file(engine, cwasm_path)
+        except WasmtimeError:
+            pass  # stale artifact; recompile below
+    module = Module(engine, wasm_bytes)
+    try:
+        tmp_path = cwasm_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(module.serialize())
+        os.replace(tmp_path, cwasm_path)
+    except OSError:
+        pass  # not writable; compile every run
+    return module
+
 
 class ShaderTranslator:
     """
@@ -18,16 +74,14 @@ class ShaderTranslator:
     """
     def __init__(self, wasm_path: str):
         print(f"Initializing WASM runtime and loading module from: {wasm_path}")
-        config = Config()
-        config.wasm_exceptions = True
-        self.store = Store(Engine(config))
+        self.store = Store(_shared_engine())
         wasi_config = WasiConfig()
         wasi_config.argv = []
         wasi_config.env = []
         self.store.set_wasi(wasi_config)
         linker = Linker(self.store.engine)
         linker.define_wasi()
-        self.module = Module(self.store.engine, open(wasm_path, 'rb').read())
+        self.module = _load_module(self.store.engine, wasm_path)
         self.instance = linker.instantiate(self.store, self.module)
         self.exports = self.instance.exports(self.store)
         self._initialize = self.exports["initialize"]
@@ -43,58 +97,131 @@ class ShaderTranslator:
             raise RuntimeError("CRITICAL: The ANGLE library failed to initialize (sh::Initialize() returned false).")
         print("ANGLE library initialized successfully.")
 
+        # Reusable request buffer inside WASM memory; grown on demand so the
+        # steady state pays no malloc/free host calls per translate.
+        self._scratch_ptr = 0
+        self._scratch_cap = 0
+        self._ensure_scratch(64 * 1024)
+
     def finalize(self):
-        print("Finalizing ANGLE library.")
+        # debug-level: shutdown shouldn't block on stdout in servers that
+        # tear down one translator per request.
+        logging.getLogger(__name__).debug("Finalizing ANGLE library.")
+        if self._scratch_ptr:
+            self._free(self.store, self._scratch_ptr)
+            self._scratch_ptr = 0
+            self._scratch_cap = 0
         self._finalize(self.store)
 
-    def _read_string_from_memory(self, ptr: int) -> str:
-        memory_data = self.memory.read(self.store, ptr, self.memory.data_len(self.store) - ptr)
-        null_terminator_pos = memory_data.find(b'\0')
-        if null_terminator_pos == -1:
-            raise ValueError("String from WASM is not null-terminated")
-        return memory_data[:null_terminator_pos].decode('utf-8')
-
-    def _write_string_to_memory(self, s: str) -> int:
-        s_bytes = s.encode('utf-8')
-        ptr = self._malloc(self.store, len(s_bytes) + 1)
-        if not ptr:
-            raise MemoryError("WASM malloc failed to allocate memory.")
-        self.memory.write(self.store, s_bytes, ptr)
-        self.memory.write(self.store, b'\0', ptr + len(s_bytes))
-        return ptr
-
-    def translate(self, shader_code: str, shader_type: str, spec: str, output: str) -> dict:
-        shader_code_b64 = base64.b64encode(shader_code.encode('utf-8')).decode('utf-8')
-        request_payload = {
-            "jsonrpc": "2.0", "id": 1, "method": "translate",
-            "params": {
-                "shader_code_base64": shader_code_b64,
-                "shader_type": shader_type,
-                "spec": spec, "output": output,
-                "print_active_variables": True,
-                "compile_options": {"objectCode": True}
-            }
-        }
-        request_str = json.dumps(request_payload)
-        request_ptr = 0
-        try:
-            request_ptr = self._write_string_to_memory(request_str)
-            result_ptr = self._invoke(self.store, request_ptr)
-            if not result_ptr: raise RuntimeError("WASM invoke returned a null pointer.")
-            response_str = self._read_string_from_memory(result_ptr)
-        finally:
-            if request_ptr: self._free(self.store, request_ptr)
-        return json.loads(response_str)
+    def _ensure_scratch(self, size: int) -> int:
+        """Returns the scratch pointer, growing the buffer if `size` exceeds it."""
+        if size > self._scratch_cap:
+            if self._scratch_ptr:
+                self._free(self.store, self._scratch_ptr)
+                self._scratch_ptr = 0
+                self._scratch_cap = 0
+            ptr = self._malloc(self.store, size)
+            if not ptr:
+                raise MemoryError("WASM malloc failed to allocate memory.")
+            self._scratch_ptr = ptr
+            self._scratch_cap = size
+        return self._scratch_ptr
+
+    def _invoke_json(self, request_bytes: bytes):
+        """Writes a request into the scratch buffer, invokes, parses the response."""
+        request_ptr = self._ensure_scratch(len(request_bytes) + 1)
+        self.memory.write(self.store, request_bytes + b'\0', request_ptr)
+        result_ptr = self._invoke(self.store, request_ptr)
+        if not result_ptr: raise RuntimeError("WASM invoke returned a null pointer.")
+        return _loads(self._read_bytes_from_memory(result_ptr))
+
+    def _read_bytes_from_memory(self, ptr: int) -> bytes:
+        # Responses are bounded JSON, so read in geometrically growing chunks
+        # instead of copying the entire remaining heap. data_len crosses the
+        # host boundary, so it is fetched exactly once per call. The bytes go
+        # straight to the JSON parser; no intermediate str is built.
+        data_len = self.memory.data_len(self.store)
+        chunk_size = 4096
+        parts = []
+        pos = ptr
+        while pos < data_len:
+            stop = min(pos + chunk_size, data_len)
+            chunk = self.memory.read(self.store, pos, stop)
+            null_terminator_pos = chunk.find(b'\0')
+            if null_terminator_pos != -1:
+                parts.append(chunk[:null_terminator_pos])
+                return b"".join(parts)
+            parts.append(chunk)
+            pos = stop
+            chunk_size *= 2
+        raise ValueError("String from WASM is not null-terminated")
+
+    def translate(self, shader_code, shader_type: str, spec: str, output: str) -> dict:
+        if isinstance(shader_code, str):
+            shader_code = shader_code.encode('utf-8')
+        shader_code_b64 = base64.b64encode(shader_code).decode('utf-8')
+        request_bytes = _REQUEST_TEMPLATE.format(
+            rid=1, code=shader_code_b64, stype=shader_type, spec=spec, out=output
+        ).encode('ascii')
+        return self._invoke_json(request_bytes)
+
+    def translate_batch(self, jobs: list) -> list:
+        """
+        Translates several shaders in one WASM invoke.
+        jobs is a list of (shader_code, shader_type, spec, output) tuples;
+        returns one response dict per job, in order.
+        """
+        items = []
+        for i, (shader_code, shader_type, spec, output) in enumerate(jobs):
+            if isinstance(shader_code, str):
+                shader_code = shader_code.encode('utf-8')
+            shader_code_b64 = base64.b64encode(shader_code).decode('utf-8')
+            items.append(_REQUEST_TEMPLATE.format(
+                rid=i + 1, code=shader_code_b64, stype=shader_type, spec=spec, out=output))
+        request_bytes = ("[" + ",".join(items) + "]").encode('ascii')
+        response = self._invoke_json(request_bytes)
+        if not isinstance(response, list):
+            # Older wasm build without batch support: one call per shader.
+            return [self.translate(*job) for job in jobs]
+        by_id = {r.get("id"): r for r in response if isinstance(r, dict)}
+        return [by_id.get(i + 1, {}) for i in range(len(jobs))]
 
 # ==============================================================================
 # 2. Create a single, global instance of the translator
 # ==============================================================================
+# Single worker used to overlap shader translation with window/GL setup.
+_translate_executor = ThreadPoolExecutor(max_workers=1)
+
+# Fullscreen quad (two triangles), packed once at import time.
+_QUAD_BYTES = np.array([-1, -1, 1, -1, -1, 1, -1, 1, 1, -1, 1, 1], dtype=np.float32).tobytes()
+
+# The Shadertoy uniforms this app knows how to feed.
+_SHADERTOY_UNIFORMS = {"iResolution", "iTime", "iTimeDelta", "iFrame", "iMouse", "iDate"}
+
+# Static JSON-RPC request skeleton. Only four fields vary per call, and all
+# of them are JSON-safe by construction (base64 output and fixed enum
+# strings), so str.format replaces a full dict walk through json.dumps.
+_REQUEST_TEMPLATE = (
+    '{{"jsonrpc":"2.0","id":{rid},"method":"translate","params":{{'
+    '"shader_code_base64":"{code}","shader_type":"{stype}","spec":"{spec}",'
+    '"output":"{out}","print_active_variables":true,'
+    '"compile_options":{{"objectCode":true}}}}}}'
+)
+
 WASM_FILE_PATH = "./wasm_output/angle_shader_translator_standalone.wasm"
-try:
-    translator = ShaderTranslator(WASM_FILE_PATH)
-except Exception as e:
-    print(f"FATAL: Could not initialize the WASM translator: {e}")
-    exit()
+_translator = None
+
+
+def get_translator() -> ShaderTranslator:
+    """Constructs the shared translator on first use.
+
+    Deferring this keeps `import shadertoy` near-free: the WASM module is
+    only loaded and ANGLE only initialized when a translation is requested.
+    """
+    global _translator
+    if _translator is None:
+        _translator = ShaderTranslator(WASM_FILE_PATH)
+    return _translator
 
 # ==============================================================================
 # 3. Create a new translation function that uses the WASM module
@@ -108,8 +235,21 @@ def translate_shader(shader_string: str, shader_type: str, spec: str, output: st
         A tuple: (translated_code, reflection_data, error_string)
     """
     print(f"Translating {shader_type} shader from {spec} to {output}...")
-    response = translator.translate(shader_string, shader_type, spec, output)
+    response = get_translator().translate(shader_string, shader_type, spec, output)
+    return _unpack_response(response)
+
 
+def translate_shaders(jobs: list) -> list:
+    """
+    Translates several shaders in one WASM invoke.
+    jobs is a list of (shader_code, shader_type, spec, output) tuples;
+    returns one (translated_code, reflection_data, error_string) tuple per job.
+    """
+    responses = get_translator().translate_batch(jobs)
+    return [_unpack_response(r) for r in responses]
+
+
+def _unpack_response(response: dict) -> tuple[str | None, dict | None, str | None]:
     if "error" in response:
         error_info = response["error"]
         error_message = f"ANGLE Error Code {error_info.get('code')}: {error_info.get('message')}\n"
@@ -125,6 +265,70 @@ def translate_shader(shader_string: str, shader_type: str, spec: str, output: st
     
     return None, None, "Unknown error: Invalid JSON response from translator."
 
+_VERTEX_SHADER_SOURCE = b"""#version 300 es
+    in vec2 in_vert;
+    out vec2 v_frag_coord_uv;
+    void main() {
+        gl_Position = vec4(in_vert, 0.0, 1.0);
+        v_frag_coord_uv = in_vert * 0.5 + 0.5;
+    }
+"""
+
+_SHADERTOY_CORE_LOGIC = b"""
+void mainImage( out vec4 o, vec2 u )
+{
+    // ... (Your creative shader code remains here) ...
+    vec2 R=iResolution.xy, uv=(u+u-R)/R.y;
+    o=mix(vec4(uv,.5+.5*cos(iTime),1),o,sin(length(uv)));
+}
+"""
+
+# Fragment-shader boilerplate, pre-encoded once per process. Only the
+# iResolution constant varies, so assembling a shader is three bytes
+# concatenations instead of re-encoding a multi-KB f-string per window.
+_FRAG_HEAD_TMPL = b"""#version 300 es
+    precision highp float;
+    const vec3 iResolution = vec3(%.1f, %.1f, 1.0);
+    layout(std140) uniform ShadertoyUBO {
+        float iTime;
+        vec4 iMouse;
+    };
+    in vec2 v_frag_coord_uv;
+    out vec4 out_FragColor;
+"""
+
+_FRAG_TAIL = b"""
+    void main() {
+        vec2 pixel_coords = v_frag_coord_uv * iResolution.xy;
+        mainImage(out_FragColor, pixel_coords);
+    }
+"""
+
+
+@functools.lru_cache(maxsize=8)
+def _translate_program_sources(width: int, height: int) -> tuple:
+    """
+    Translates the demo's vertex/fragment pair for a given window size.
+
+    The fragment shader bakes iResolution in as a const, so the translated
+    output is a pure function of (width, height); caching here means
+    recreating a ShaderToy at a previously seen size skips the whole
+    translate round-trip. GL objects stay per-context and are rebuilt.
+    """
+    # iResolution is fixed per size, so it is baked in as a const: ANGLE and
+    # the downstream GLSL compiler can then constant-fold all resolution-
+    # dependent math instead of reloading a uniform per frame.
+    gles_fragment_shader = (
+        _FRAG_HEAD_TMPL % (float(width), float(height))
+        + _SHADERTOY_CORE_LOGIC
+        + _FRAG_TAIL
+    )
+    return tuple(translate_shaders([
+        (_VERTEX_SHADER_SOURCE, "vertex", "webgl2", "glsl330"),
+        (gles_fragment_shader, "fragment", "webgl2", "glsl330"),
+    ]))
+
+
 class ShaderToy:
     def __init__(self, width=1280, height=720):
         # ... (pygame and moderngl setup is the same) ...
@@ -132,7 +336,21 @@ class ShaderToy:
         self.height = height
         self.screen_size = (self.width, self.height)
 
+        # ==============================================================================
+        # 4. Use the new WASM translation function
+        # ==============================================================================
+        # Kick off the (cached) translation on a worker thread so any WASM
+        # work overlaps the pygame/moderngl context setup below. The wasmtime
+        # Store is not thread-safe, but only the worker touches it until
+        # .result() returns.
+        translation_future = _translate_executor.submit(
+            _translate_program_sources, self.width, self.height)
+
         pg.init()
+        # Let SDL's queue drop everything we never look at (window focus,
+        # keyboard, etc.) instead of materializing a Python event per item.
+        pg.event.set_blocked(None)
+        pg.event.set_allowed([pg.QUIT, pg.MOUSEMOTION, pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP])
         pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, 3)
         pg.display.gl_set_attribute(pg.GL_CONTEXT_MINOR_VERSION, 3)
         pg.display.gl_set_attribute(pg.GL_CONTEXT_PROFILE_MASK, pg.GL_CONTEXT_PROFILE_CORE)
@@ -140,9 +358,11 @@ class ShaderToy:
         pg.display.gl_set_attribute(pg.GL_DOUBLEBUFFER, 1)
         pg.display.gl_set_attribute(pg.GL_DEPTH_SIZE, 0)
 
-        self.screen = pg.display.set_mode(self.screen_size, pg.OPENGL | pg.DOUBLEBUF)
+        # vsync=1 lets the swap block on scanout instead of free-spinning.
+        self.screen = pg.display.set_mode(self.screen_size, pg.OPENGL | pg.DOUBLEBUF, vsync=1)
         pg.display.set_caption("ModernGL Shadertoy with WASM ANGLE")
         self.ctx = moderngl.create_context()
+        self.clock = pg.time.Clock()
 
         self.start_time = time.time()
         # ... (rest of the variable setup is the same) ...
@@ -150,53 +370,15 @@ class ShaderToy:
         self.frame_count = 0
         self.mouse_pos = [0.0, 0.0, 0.0, 0.0]
 
-        webgl_vertex_shader_source = """#version 300 es
-            in vec2 in_vert;
-            out vec2 v_frag_coord_uv; 
-            void main() {
-                gl_Position = vec4(in_vert, 0.0, 1.0);
-                v_frag_coord_uv = in_vert * 0.5 + 0.5;
-            }
-        """
-
-        shadertoy_core_logic = """
-        void mainImage( out vec4 o, vec2 u )
-        {
-            // ... (Your creative shader code remains here) ...
-            vec2 R=iResolution.xy, uv=(u+u-R)/R.y;
-            o=mix(vec4(uv,.5+.5*cos(iTime),1),o,sin(length(uv)));
-        }
-        """
-
-        gles_fragment_shader_string = f"""#version 300 es
-            precision highp float;
-            uniform vec3 iResolution;
-            uniform float iTime;
-            uniform vec4 iMouse;
-            in vec2 v_frag_coord_uv; 
-            out vec4 out_FragColor;
-            {shadertoy_core_logic}
-            void main() {{
-                vec2 pixel_coords = v_frag_coord_uv * iResolution.xy;
-                mainImage(out_FragColor, pixel_coords);
-            }}
-        """
-
-        # ==============================================================================
-        # 4. Use the new WASM translation function
-        # ==============================================================================
-        translated_vertex_shader, vs_reflection, vs_error = translate_shader(
-            webgl_vertex_shader_source, "vertex", "webgl2", "glsl330"
-        )
+        # Collect the translations started before the GL context setup.
+        (translated_vertex_shader, vs_reflection, vs_error), \
+            (translated_fragment_shader, fs_reflection, fs_error) = translation_future.result()
         if vs_error:
             print(f"Vertex Shader translation FAILED!\n{vs_error}")
             pg.quit()
             exit()
         print("--- Translated Vertex Shader ---\n", translated_vertex_shader)
 
-        translated_fragment_shader, fs_reflection, fs_error = translate_shader(
-            gles_fragment_shader_string, "fragment", "webgl2", "glsl330"
-        )
         if fs_error:
             print(f"Fragment Shader translation FAILED!\n{fs_error}")
             pg.quit()
@@ -216,28 +398,49 @@ class ShaderToy:
         # ==============================================================================
         # 5. Use the reflection data to find uniforms automatically!
         # ==============================================================================
-        self.uniforms = {}
-        # We only care about uniforms from the fragment shader's reflection data
+        # We only care about the known Shadertoy uniforms from the fragment
+        # shader's reflection data; an explicit set beats the old
+        # startswith("i") heuristic and makes the mapping a single pass.
         print("\n--- Automatically Mapping Uniforms ---")
+        self.uniforms = {}
         if fs_reflection and 'uniforms' in fs_reflection:
-            for uniform_data in fs_reflection['uniforms']:
-                original_name = uniform_data['name']
-                mapped_name = uniform_data['mapped_name']
-                
-                # The names we look for in python (iTime, etc.)
-                uniform_key = original_name
-                if uniform_key.startswith("i"): # a simple heuristic for iTime, iResolution etc
-                    uniform = self.program.get(mapped_name, None)
-                    if uniform:
-                        self.uniforms[uniform_key] = uniform
-                        print(f"Found and mapped uniform: '{uniform_key}' -> '{mapped_name}'")
-                    else:
-                        print(f"Warning: Uniform '{original_name}' (mapped to '{mapped_name}') not found in final program.")
+            self.uniforms = {
+                u['name']: uniform
+                for u in fs_reflection['uniforms']
+                if u['name'] in _SHADERTOY_UNIFORMS
+                and (uniform := self.program.get(u['mapped_name'], None)) is not None
+            }
+        for name in sorted(self.uniforms):
+            print(f"Found and mapped uniform: '{name}'")
+
+        # ==============================================================================
+        # 5b. Upload the time-varying uniforms through a single UBO
+        # ==============================================================================
+        # One buffer write per frame replaces a glUniform* call per value.
+        # std140 layout: float iTime at offset 0, vec4 iMouse at offset 16.
+        self._ubo_arr = np.zeros(8, dtype='f4')
+        self.ubo = None
+        ubo_block_name = None
+        if fs_reflection and fs_reflection.get('uniform_blocks'):
+            for block in fs_reflection['uniform_blocks']:
+                if block and block.get('name') == 'ShadertoyUBO':
+                    ubo_block_name = block.get('mapped_name', 'ShadertoyUBO')
+                    break
+        if ubo_block_name is not None:
+            block = self.program.get(ubo_block_name, None)
+            if block is not None:
+                block.binding = 0
+                self.ubo = self.ctx.buffer(reserve=self._ubo_arr.nbytes)
+                self.ubo.bind_to_uniform_block(0)
+                print(f"Bound uniform block '{ubo_block_name}' to binding 0.")
+
+        # Pre-resolve the fallback uniforms so the per-frame path does no
+        # dict lookups; attribute access on a fixed set is cheaper.
+        self._u_time = self.uniforms.get("iTime")
+        self._u_mouse = self.uniforms.get("iMouse")
 
         # Fullscreen quad VBO and VAO
-        quad_vertices = [-1.0, -1.0, 1.0, -1.0, -1.0, 1.0, -1.0, 1.0, 1.0, -1.0, 1.0, 1.0]
-        vertex_data = struct.pack(f'{len(quad_vertices)}f', *quad_vertices)
-        self.vbo = self.ctx.buffer(vertex_data)
+        self.vbo = self.ctx.buffer(_QUAD_BYTES)
         
         # Find the vertex attribute name automatically from reflection data
         vs_in_attribute_name = "in_vert" # Default
@@ -256,23 +459,37 @@ class ShaderToy:
         self.ctx.clear(0.0, 0.0, 0.0)
         new_time = time.time()
         self.current_time = new_time - self.start_time
-        if "iResolution" in self.uniforms:
-            self.uniforms["iResolution"].value = (self.width, self.height, 1.0)
-        if "iTime" in self.uniforms:
-            self.uniforms["iTime"].value = self.current_time
-        if "iMouse" in self.uniforms:
-            self.uniforms["iMouse"].value = tuple(self.mouse_pos)
+        if self.ubo is not None:
+            self._ubo_arr[0] = self.current_time
+            self._ubo_arr[4:8] = self.mouse_pos
+            self.ubo.write(self._ubo_arr)
+        else:
+            # Fallback when the block was optimized out of the reflection data.
+            if self._u_time is not None:
+                self._u_time.value = self.current_time
+            if self._u_mouse is not None:
+                self._u_mouse.value = tuple(self.mouse_pos)
         self.vao.render(moderngl.TRIANGLES)
         pg.display.flip()
 
     def run(self):
-        # ... (run loop is the same) ...
+        # Only the allowed event types (quit + mouse) ever reach this loop.
         running = True
         while running:
             for event in pg.event.get():
                 if event.type == pg.QUIT: running = False
-                # Handle mouse input
+                elif event.type == pg.MOUSEMOTION:
+                    self.mouse_pos[0] = float(event.pos[0])
+                    self.mouse_pos[1] = float(self.height - 1 - event.pos[1])
+                elif event.type == pg.MOUSEBUTTONDOWN and event.button == 1:
+                    self.mouse_pos[2] = float(event.pos[0])
+                    self.mouse_pos[3] = float(self.height - 1 - event.pos[1])
+                elif event.type == pg.MOUSEBUTTONUP and event.button == 1:
+                    self.mouse_pos[2] = 0.0
+                    self.mouse_pos[3] = 0.0
             self.render()
+            # Cap at 60 Hz so displays without working vsync don't spin.
+            self.clock.tick(60)
 
 # ==============================================================================
 # 6. Main execution block with finalization
@@ -285,5 +502,6 @@ if __name__ == '__main__':
         print(f"An error occurred during execution: {e}")
     finally:
         # Ensure the ANGLE library is cleaned up properly on exit
-        translator.finalize()
+        if _translator is not None:
+            _translator.finalize()
         pg.quit()
\ No newline at end of file
@@ -1,23 +1,63 @@
 import pygame as pg
 import moderngl
+import numpy as np
+import ctypes
 import struct
 import time
 import subprocess # Still needed for ShaderTranslatorRPCClient
+import selectors
+import atexit
 import os
 import re
 import json     # For ShaderTranslatorRPCClient
 import base64   # For ShaderTranslatorRPCClient
+import hashlib  # For the on-disk translation cache
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+    _loads = json.loads
+
+# Content-addressed cache of finished translations, so relaunches skip the
+# subprocess round trip for shaders they have already translated.
+_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "py-webgl-transpiler")
+
+# Fullscreen-quad vertex data, packed once at import time: 4 vertices
+# drawn as a triangle strip instead of a 6-vertex triangle list, so the
+# vertex shader runs 4 times per frame rather than 6.
+_QUAD_BYTES = np.array([-1, -1, 1, -1, -1, 1, 1, 1], dtype=np.float32).tobytes()
 
 # --- ShaderTranslatorRPCClient Class (from previous responses) ---
 # Ensure this class definition is included here. For brevity, I'm assuming it's
 # the version we developed that handles JSON RPC, process management, and base64.
 # If you need it again, I can paste the full class.
 class ShaderTranslatorRPCClient:
-    def __init__(self, translator_executable_path):
+    def __init__(self, translator_executable_path, framed=False, rpc_timeout=30.0):
         self.executable_path = translator_executable_path
         self.process = None
         self.request_id_counter = 0
-        self._start_process()
+        # Per-read timeout for responses; a stalled translator raises
+        # TimeoutError instead of blocking readline() forever.
+        self.rpc_timeout = rpc_timeout
+        self._sel = None
+        # framed=True uses --json-rpc-framed: raw binary pipes with
+        # <I little-endian length> prefixes instead of utf-8 text lines, so
+        # no per-byte decode and no scan-for-newline on the hot path.
+        # Off by default: older translator builds only speak line mode.
+        self.framed = framed
+        # The subprocess is spawned lazily by _send_request/_send_batch on
+        # the first cache miss, so fully-cached runs never pay
+        # fork+exec+ANGLE init. shutdown() is a no-op while process is None.
 
     def _start_process(self):
         if self.process and self.process.poll() is None:
@@ -29,23 +69,115 @@ class ShaderTranslatorRPCClient:
             raise PermissionError(f"Translator executable at {self.executable_path} is not executable")
 
         try:
-            self.process = subprocess.Popen(
-                [self.executable_path, "--json-rpc"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1, 
-                universal_newlines=True, # Ensures text mode for pipes
-                encoding='utf-8' # Explicitly set encoding
-            )
+            if self.framed:
+                self.process = subprocess.Popen(
+                    [self.executable_path, "--json-rpc-framed"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    # Unbuffered binary pipes: the selector in
+                    # _wait_readable watches the raw fd, so stdout must not
+                    # sit behind a BufferedReader that slurps a whole frame
+                    # on the first read and leaves the fd empty — that
+                    # turns every buffered response into a bogus timeout.
+                    # Frames are still written as one bytes object each
+                    # (_write_all loops on the rare partial pipe write).
+                    bufsize=0
+                )
+            else:
+                self.process = subprocess.Popen(
+                    [self.executable_path, "--json-rpc"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    bufsize=1,
+                    universal_newlines=True, # Ensures text mode for pipes
+                    encoding='utf-8' # Explicitly set encoding
+                )
         except Exception as e:
             raise ConnectionError(f"Failed to start translator subprocess: {e}")
 
+        if self._sel is not None:
+            self._sel.close()
+            self._sel = None
+        try:
+            self._sel = selectors.DefaultSelector()
+            self._sel.register(self.process.stdout, selectors.EVENT_READ)
+        except (OSError, ValueError):
+            # select() can't watch pipes everywhere (notably Windows);
+            # fall back to plain blocking reads without a timeout.
+            self._sel = None
+
+    def _wait_readable(self):
+        """Blocks until stdout has data, or raises TimeoutError."""
+        if self._sel is None:
+            return
+        if not self._sel.select(timeout=self.rpc_timeout):
+            self.process.poll()
+            raise TimeoutError(
+                f"No response from translator within {self.rpc_timeout}s. "
+                f"Return code: {self.process.returncode}. Stderr hint: '{self._stderr_hint()}'"
+            )
+
+    def _stderr_hint(self) -> str:
+        """Best-effort grab of any stderr output for error messages.
+
+        Only reads once the child has exited: readlines() on a live
+        process blocks until its stderr reaches EOF, which would turn a
+        timeout diagnostic into exactly the hang it is reporting.
+        """
+        try:
+            if not (self.process and self.process.stderr):
+                return ""
+            if self.process.poll() is None:
+                return "(process still running; stderr not read)"
+            lines = self.process.stderr.readlines()
+            return "".join(
+                l.decode('utf-8', 'replace') if isinstance(l, bytes) else l
+                for l in lines).strip()
+        except Exception as e_stderr:
+            return f"(Error reading stderr: {e_stderr})"
+
+    def _write_all(self, data: bytes):
+        """Writes all of `data` to the unbuffered framed-mode stdin pipe.
+
+        A raw pipe write can come up short when `data` exceeds the pipe
+        buffer, so loop until everything left the process.
+        """
+        view = memoryview(data)
+        while view:
+            written = self.process.stdin.write(view)
+            view = view[written:]
+
+    def _read_exact(self, n: int) -> bytes:
+        """Reads exactly n bytes from the framed-mode stdout pipe."""
+        chunks = []
+        remaining = n
+        while remaining > 0:
+            self._wait_readable()
+            # The pipe is unbuffered (see _start_process), so this is a
+            # single os.read on the fd the selector just watched: it
+            # returns whatever is available instead of blocking until all
+            # `remaining` bytes arrive, and the timeout above is re-armed
+            # for every chunk of the frame.
+            chunk = self.process.stdout.read(remaining)
+            if not chunk:
+                self.process.poll()
+                raise ConnectionError(
+                    f"Translator pipe closed mid-frame ({remaining} of {n} bytes missing). "
+                    f"Return code: {self.process.returncode}. Stderr hint: '{self._stderr_hint()}'"
+                )
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
 
     def _generate_request_id(self):
+        # JSON-RPC allows integer ids; the counter is already unique per
+        # client, so no timestamp/string formatting per request.
         self.request_id_counter += 1
-        return f"py_req_{self.request_id_counter}_{time.time_ns()}" # More unique ID
+        return self.request_id_counter
 
     def _send_request(self, method: str, params: dict) -> dict:
         if not self.process or self.process.poll() is not None:
@@ -61,75 +193,162 @@ class ShaderTranslatorRPCClient:
             "params": params,
             "id": request_id
         }
-        request_str = json.dumps(rpc_request)
-        
+
+        blob = b""
+        if self.framed:
+            shader_bytes = params.pop("_shader_bytes", None)
+            if shader_bytes is not None:
+                params["shader_code_blob_offset"] = 0
+                params["shader_code_blob_len"] = len(shader_bytes)
+                blob = shader_bytes
+
+        response_payload, response_blob = self._exchange(_dumps(rpc_request), request_id, blob)
+        response_json = _loads(response_payload)
+        self._attach_blob_slices([response_json], response_blob)
+        if response_json.get("id") != request_id:
+             # This is a more serious issue, indicates out-of-order or mismatched responses
+            print(f"CRITICAL WARNING: Response ID mismatch for request {request_id}. Expected {request_id}, got {response_json.get('id')}. Response: {response_json}")
+            # Depending on the application, this could be a fatal error or an ignored one.
+
+        return response_json
+
+    def _send_batch(self, method: str, params_list: list) -> list:
+        """
+        Sends several requests as one JSON-RPC 2.0 batch array — a single
+        pipe write + single readline for the whole set — and returns the
+        responses in params order.
+        """
+        if not self.process or self.process.poll() is not None:
+            self._start_process()
+            if not self.process or self.process.poll() is not None:
+                 raise ConnectionError("Failed to start or connect to the translator process after restart attempt.")
+
+        request_ids = [self._generate_request_id() for _ in params_list]
+        batch = [
+            {"jsonrpc": "2.0", "method": method, "params": params, "id": rid}
+            for params, rid in zip(params_list, request_ids)
+        ]
+        label = request_ids[0] if request_ids else "empty_batch"
+
+        blob = b""
+        if self.framed:
+            # Shader sources ride the raw frame blob; each request's params
+            # carry an (offset, len) slice instead of the source itself.
+            blob_parts = []
+            blob_len = 0
+            for params in params_list:
+                shader_bytes = params.pop("_shader_bytes", None)
+                if shader_bytes is not None:
+                    params["shader_code_blob_offset"] = blob_len
+                    params["shader_code_blob_len"] = len(shader_bytes)
+                    blob_parts.append(shader_bytes)
+                    blob_len += len(shader_bytes)
+            blob = b"".join(blob_parts)
+
+        response_payload, response_blob = self._exchange(_dumps(batch), label, blob)
+        responses = _loads(response_payload)
+        if not isinstance(responses, list):
+            raise ConnectionError(
+                f"Expected a batch response array for {label}, got: {responses!r:.200}")
+        by_id = {r.get("id"): r for r in responses if isinstance(r, dict)}
+        missing = [rid for rid in request_ids if rid not in by_id]
+        if missing:
+            raise ConnectionError(f"Batch response missing ids {missing}. Response: {responses}")
+        self._attach_blob_slices(responses, response_blob)
+        return [by_id[rid] for rid in request_ids]
+
+    @staticmethod
+    def _attach_blob_slices(responses: list, response_blob: bytes):
+        """Resolves object_code blob slices into '_object_code_bytes' entries."""
+        if not response_blob:
+            return
+        for response in responses:
+            result = response.get("result") if isinstance(response, dict) else None
+            if isinstance(result, dict) and "object_code_blob_len" in result:
+                offset = result.get("object_code_blob_offset", 0)
+                result["_object_code_bytes"] = response_blob[offset:offset + result["object_code_blob_len"]]
+
+    def _exchange(self, request_str: str, request_id, blob: bytes = b""):
+        """One pipe round trip; returns (response_payload, response_blob).
+
+        Line mode: write a request line, read a response line (str, blob
+        always empty). Framed mode: write
+        <I json_len><I blob_len> json_bytes blob_bytes and read the same
+        frame layout back — the blob is a raw binary side-channel for shader
+        source and object code, skipping base64 entirely.
+        """
         # print(f"DEBUG: Sending to C++ (ID: {request_id}): {request_str}")
         try:
+            if self.framed:
+                payload = request_str.encode('utf-8') if isinstance(request_str, str) else request_str
+                self._write_all(
+                    struct.pack('<II', len(payload), len(blob)) + payload + blob)
+                response_len, blob_len = struct.unpack('<II', self._read_exact(8))
+                response_payload = self._read_exact(response_len)
+                response_blob = self._read_exact(blob_len) if blob_len else b""
+                return response_payload, response_blob
+
+            if isinstance(request_str, bytes):
+                request_str = request_str.decode('utf-8')
             self.process.stdin.write(request_str + "\n")
             self.process.stdin.flush()
 
             # It's crucial to handle the possibility of the process dying
             # and readline() blocking indefinitely or returning empty.
+            self._wait_readable()
             response_str = self.process.stdout.readline()
             # print(f"DEBUG: Received from C++ (ID: {request_id}): {response_str.strip()}")
 
             if not response_str: # Empty response often means process died
                 self.process.poll() # Update returncode status
-                stderr_output = ""
-                try: # Try to grab stderr output non-blockingly if possible (tricky)
-                    if self.process.stderr:
-                        # Reading all of stderr can block if the process is still writing.
-                        # For a quick check, one might use select or a very short timeout read.
-                        # For simplicity, let's assume a quick read is okay or it's already available.
-                         stderr_output = "".join(self.process.stderr.readlines() if self.process.stderr.readable() else [])
-
-                except Exception as e_stderr:
-                    stderr_output = f"(Error reading stderr: {e_stderr})"
-                
                 raise ConnectionError(
                     f"No response from translator process (ID: {request_id}). It might have crashed. "
-                    f"Return code: {self.process.returncode}. Stderr hint: '{stderr_output.strip()}'"
+                    f"Return code: {self.process.returncode}. Stderr hint: '{self._stderr_hint()}'"
                 )
 
-            response_json = json.loads(response_str)
-            if response_json.get("id") != request_id:
-                 # This is a more serious issue, indicates out-of-order or mismatched responses
-                print(f"CRITICAL WARNING: Response ID mismatch for request {request_id}. Expected {request_id}, got {response_json.get('id')}. Response: {response_json}")
-                # Depending on the application, this could be a fatal error or an ignored one.
-
-            return response_json
+            return response_str, b""
 
         except BrokenPipeError:
             self.process.poll()
-            stderr_output = "".join(self.process.stderr.readlines() if self.process.stderr and self.process.stderr.readable() else [])
             raise ConnectionError(
                 f"Broken pipe for request {request_id}. Translator process likely crashed. "
-                f"Return code: {self.process.returncode}. Stderr: '{stderr_output.strip()}'"
+                f"Return code: {self.process.returncode}. Stderr: '{self._stderr_hint()}'"
             )
+        except (ConnectionError, TimeoutError):
+            raise
         except Exception as e:
             self.process.poll()
-            stderr_output = "".join(self.process.stderr.readlines() if self.process.stderr and self.process.stderr.readable() else [])
             raise ConnectionError(
                 f"Exception during communication for request {request_id}: {type(e).__name__} - {e}. "
-                f"Return code: {self.process.returncode}. Stderr: '{stderr_output.strip()}'"
+                f"Return code: {self.process.returncode}. Stderr: '{self._stderr_hint()}'"
             )
 
-    def translate(self, shader_code_str: str, shader_type: str, 
-                  spec: str, output_format: str, 
-                  compile_options: dict = None, 
-                  resources: dict = None, 
-                  print_active_variables: bool = False) -> dict:
-
-        shader_code_base64 = base64.b64encode(shader_code_str.encode('utf-8')).decode('ascii')
-        
+    def _build_translate_params(self, shader_code_str: str, shader_type: str,
+                                spec: str, output_format: str,
+                                compile_options: dict = None,
+                                resources: dict = None,
+                                print_active_variables: bool = False,
+                                filter_active_variables: list = None) -> dict:
         params = {
-            "shader_code_base64": shader_code_base64,
             "shader_type": shader_type,
             "spec": spec,
             "output": output_format,
             "print_active_variables": print_active_variables
         }
-        
+
+        if filter_active_variables is not None:
+            # Newer translators trim active_variables to just these names;
+            # older ones ignore the extra key and return everything.
+            params["filter_active_variables"] = list(filter_active_variables)
+
+        if self.framed:
+            # Raw source travels out-of-band in the frame blob; the send path
+            # replaces this placeholder with shader_code_blob_offset/len.
+            params["_shader_bytes"] = shader_code_str.encode('utf-8')
+        else:
+            # Legacy line-mode servers only take base64-wrapped source.
+            params["shader_code_base64"] = base64.b64encode(shader_code_str.encode('utf-8')).decode('ascii')
+
         # Ensure default compile_options are set if not provided, especially object_code
         final_compile_options = {"object_code": True, "initialize_uninitialized_locals": True}
         if compile_options:
@@ -138,9 +357,153 @@ class ShaderTranslatorRPCClient:
 
         if resources:
             params["resources"] = resources
+        return params
+
+    def _cache_key(self, job: dict) -> str:
+        """Content hash of one translation job plus the translator build."""
+        try:
+            exe_mtime_ns = os.stat(self.executable_path).st_mtime_ns
+        except OSError:
+            exe_mtime_ns = 0
+        canonical = json.dumps({
+            "shader_type": job["shader_type"],
+            "spec": job["spec"],
+            "output_format": job["output_format"],
+            "compile_options": job.get("compile_options"),
+            "resources": job.get("resources"),
+            "print_active_variables": job.get("print_active_variables", False),
+            "filter_active_variables": job.get("filter_active_variables"),
+            "exe_mtime_ns": exe_mtime_ns,
+        }, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.blake2b(canonical.encode('utf-8'))
+        digest.update(job["shader_code_str"].encode('utf-8'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _cache_path(key: str) -> str:
+        return os.path.join(_CACHE_DIR, key + ".json")
 
-        response = self._send_request("translate", params)
+    def _cache_get(self, key: str):
+        try:
+            with open(self._cache_path(key), "rb") as f:
+                entry = _loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if entry.get("object_code_b64") is not None:  # Binary (SPIR-V) output
+            object_code = base64.b64decode(entry["object_code_b64"])
+        else:
+            object_code = entry.get("object_code")
+        return {
+            "object_code": object_code,
+            "info_log": entry.get("info_log", ""),
+            "active_variables": entry.get("active_variables"),
+        }
 
+    def _cache_put(self, key: str, result: dict):
+        entry = {
+            "info_log": result["info_log"],
+            "active_variables": result["active_variables"],
+        }
+        if isinstance(result["object_code"], bytes):
+            entry["object_code_b64"] = base64.b64encode(result["object_code"]).decode('ascii')
+        else:
+            entry["object_code"] = result["object_code"]
+        try:
+            os.makedirs(_CACHE_DIR, exist_ok=True)
+            # Atomic publish: never expose a half-written cache entry.
+            tmp_path = self._cache_path(key) + f".tmp.{os.getpid()}"
+            with open(tmp_path, "wb") as f:
+                f.write(_dumps(entry))
+            os.replace(tmp_path, self._cache_path(key))
+        except OSError:
+            pass  # The cache is best-effort; translation already succeeded.
+
+    def prepare_params_template(self, spec: str, output_format: str,
+                                compile_options: dict = None,
+                                resources: dict = None,
+                                print_active_variables: bool = False) -> dict:
+        """
+        Builds the job fields shared by several translate calls once.
+
+        Merge per-shader fields on top with
+        {**template, "shader_code_str": src, "shader_type": "vertex"} and
+        hand the jobs to translate_many(); the constant spec/output/options
+        dicts are built a single time instead of per call.
+        """
+        template = {
+            "spec": spec,
+            "output_format": output_format,
+            "print_active_variables": print_active_variables,
+        }
+        if compile_options is not None:
+            template["compile_options"] = compile_options
+        if resources is not None:
+            template["resources"] = resources
+        return template
+
+    def translate(self, shader_code_str: str, shader_type: str,
+                  spec: str, output_format: str,
+                  compile_options: dict = None,
+                  resources: dict = None,
+                  print_active_variables: bool = False,
+                  filter_active_variables: list = None,
+                  use_cache: bool = True) -> dict:
+        return self.translate_many([{
+            "shader_code_str": shader_code_str,
+            "shader_type": shader_type,
+            "spec": spec,
+            "output_format": output_format,
+            "compile_options": compile_options,
+            "resources": resources,
+            "print_active_variables": print_active_variables,
+            "filter_active_variables": filter_active_variables,
+        }], use_cache=use_cache)[0]
+
+    def translate_many(self, jobs: list, use_cache: bool = True) -> list:
+        """
+        Translates several shaders in one JSON-RPC batch round trip.
+
+        Each job is a dict with the same keys as translate()'s arguments
+        ('shader_code_str' and 'shader_type' required). Returns one result
+        dict per job, in order. One pipe write + one readline covers the
+        whole set, so startup pays a single RPC latency for all shaders.
+
+        With use_cache=True, finished translations are kept in
+        ~/.cache/py-webgl-transpiler keyed by a content hash of the source,
+        options and translator build, so repeat runs skip the subprocess.
+        """
+        results = [None] * len(jobs)
+        keys = [None] * len(jobs)
+        pending = []
+        for i, job in enumerate(jobs):
+            if use_cache:
+                keys[i] = self._cache_key(job)
+                cached = self._cache_get(keys[i])
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            pending.append(i)
+
+        if pending:
+            params_list = [
+                self._build_translate_params(
+                    jobs[i]["shader_code_str"], jobs[i]["shader_type"],
+                    jobs[i]["spec"], jobs[i]["output_format"],
+                    jobs[i].get("compile_options"), jobs[i].get("resources"),
+                    jobs[i].get("print_active_variables", False),
+                    jobs[i].get("filter_active_variables"))
+                for i in pending
+            ]
+            responses = self._send_batch("translate", params_list)
+            for i, response, params in zip(pending, responses, params_list):
+                results[i] = self._unpack_translate_response(
+                    response, jobs[i]["output_format"], params["compile_options"])
+                if keys[i] is not None:
+                    self._cache_put(keys[i], results[i])
+        return results
+
+    def _unpack_translate_response(self, response: dict, output_format: str,
+                                   final_compile_options: dict) -> dict:
         if "error" in response and response["error"] is not None:
             err = response["error"]
             error_message = f"ANGLE Translation Error (Code: {err.get('code')}, Method: translate): {err.get('message')}"
@@ -163,9 +526,16 @@ class ShaderTranslatorRPCClient:
                              f"InfoLog (if any): {info_log_details}. Full response: {response}")
 
         translated_code_output = None
+        object_code_bytes = result.pop("_object_code_bytes", None)
         translated_code_b64 = result.get("object_code_base64")
 
-        if translated_code_b64 is not None: # Allow empty string for empty code
+        if object_code_bytes is not None:
+            # Framed mode: the object code arrived raw in the frame blob.
+            if output_format == "spirv":
+                translated_code_output = object_code_bytes
+            else:
+                translated_code_output = object_code_bytes.decode('utf-8')
+        elif translated_code_b64 is not None: # Allow empty string for empty code
             try:
                 decoded_bytes = base64.b64decode(translated_code_b64)
                 if output_format == "spirv": # Add other binary output formats if any
@@ -220,13 +590,80 @@ class ShaderTranslatorRPCClient:
                         except Exception as e_term:
                             print(f"INFO: Exception during terminate/kill: {e_term}")
         # print("DEBUG: Translator process shut down.")
+        if self._sel is not None:
+            self._sel.close()
+            self._sel = None
         self.process = None
-
-    def __del__(self):
-        self.shutdown()
 # --- End ShaderTranslatorRPCClient Class ---
 
 
+# Module-level shared client: the translator subprocess survives across
+# ShaderToy instances (and hot reloads), so only the first construction
+# pays fork+exec+ANGLE init. Shut down once at interpreter exit.
+_GLOBAL_TRANSLATOR = None
+
+
+def get_translator(translator_executable_path: str) -> ShaderTranslatorRPCClient:
+    global _GLOBAL_TRANSLATOR
+    if (_GLOBAL_TRANSLATOR is None
+            or _GLOBAL_TRANSLATOR.executable_path != translator_executable_path):
+        if _GLOBAL_TRANSLATOR is not None:
+            _GLOBAL_TRANSLATOR.shutdown()
+        _GLOBAL_TRANSLATOR = ShaderTranslatorRPCClient(translator_executable_path)
+        atexit.register(_GLOBAL_TRANSLATOR.shutdown)
+    return _GLOBAL_TRANSLATOR
+
+
+# Idle-client pool for translate_jobs_parallel; clients (and their
+# subprocesses) are reused across calls instead of re-paying ANGLE init.
+_parallel_clients = []
+_parallel_clients_lock = threading.Lock()
+
+
+def _checkout_client(translator_executable_path: str) -> ShaderTranslatorRPCClient:
+    with _parallel_clients_lock:
+        for i, client in enumerate(_parallel_clients):
+            if client.executable_path == translator_executable_path:
+                return _parallel_clients.pop(i)
+    return ShaderTranslatorRPCClient(translator_executable_path)
+
+
+def _checkin_client(client: ShaderTranslatorRPCClient):
+    with _parallel_clients_lock:
+        _parallel_clients.append(client)
+        if len(_parallel_clients) == 1:
+            atexit.register(_shutdown_parallel_clients)
+
+
+def _shutdown_parallel_clients():
+    with _parallel_clients_lock:
+        clients, _parallel_clients[:] = _parallel_clients[:], []
+    for client in clients:
+        client.shutdown()
+
+
+def translate_jobs_parallel(jobs: list, translator_executable_path: str,
+                            max_workers: int = 2) -> list:
+    """
+    Translates jobs concurrently across several translator processes.
+
+    Batching into one process (translate_many) is normally cheaper — one
+    round trip, one ANGLE init — so prefer it for a handful of shaders.
+    This helper is for servers that reject batch arrays, or for large
+    independent workloads where overlapping whole processes pays off.
+    Subprocess I/O releases the GIL, so plain threads overlap fine.
+    """
+    def translate_one(job):
+        client = _checkout_client(translator_executable_path)
+        try:
+            return client.translate_many([job])[0]
+        finally:
+            _checkin_client(client)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(translate_one, jobs))
+
+
 class ShaderToy:
     def __init__(self, width=1920, height=1080):
         self.width = width
@@ -244,11 +681,17 @@ class ShaderToy:
         pg.display.set_caption("ModernGL Shadertoy with ANGLE RPC")
         self.ctx = moderngl.create_context()
 
-        self.start_time = time.time()
+        # perf_counter_ns is monotonic, so frame deltas can't go negative
+        # and integer subtraction keeps sub-microsecond precision.
+        self._start_ns = time.perf_counter_ns()
+        self._last_ns = self._start_ns
         self.current_time = 0.0
         self.frame_count = 0
-        self.mouse_pos = [0.0, 0.0, 0.0, 0.0]
-        self.last_frame_time = self.start_time
+        # iMouse state lives in a preallocated c_float[4]; render() hands it
+        # to uniform.write() via the buffer protocol, so no per-frame tuple
+        # (and float boxing) allocations. _mouse_dirty gates the upload.
+        self._mouse_arr = (ctypes.c_float * 4)()
+        self._mouse_dirty = True
 
         # Initialize ANGLE RPC Client
         self.angle_translator_path = os.getenv(
@@ -273,7 +716,7 @@ class ShaderToy:
         
         print(f"Using ANGLE Translator Path: {self.angle_translator_path}")
         try:
-            self.translator_client = ShaderTranslatorRPCClient(self.angle_translator_path)
+            self.translator_client = get_translator(self.angle_translator_path)
         except Exception as e:
             print(f"FATAL: Could not initialize ShaderTranslatorRPCClient: {e}")
             pg.quit()
@@ -295,11 +738,15 @@ class ShaderToy:
         # 3. Construct the full WebGL GLSL ES Fragment Shader string
         gles_fragment_shader_string = f"""#version 300 es
 precision highp float;
-uniform vec3 iResolution;
-uniform float iTime;
-uniform float iTimeDelta;
-uniform int iFrame;
-uniform vec4 iMouse;
+// std140 keeps the layout predictable so the host can pack the whole
+// state with one struct.pack_into + one buffer write per frame.
+layout(std140) uniform ShadertoyUBO {{
+    vec3 iResolution;   // offset 0
+    float iTime;        // offset 12 (packs into the vec3's std140 slot)
+    vec4 iMouse;        // offset 16
+    float iTimeDelta;   // offset 32
+    int iFrame;         // offset 36
+}};
 // uniform sampler2D iChannel0; // Example, if you add textures
 
 in vec2 v_frag_coord_uv; 
@@ -320,44 +767,45 @@ void main() {{
         # For "-g330", ANGLE's `ParseGLSLOutputVersion` maps 330 to SH_GLSL_330_CORE_OUTPUT.
         # The JSON RPC C++ side should handle "glsl330" as a string for `output` param.
 
-        translation_params = {
-            "spec": "webgl2",
-            "output_format": "glsl330", # The C++ side maps this to the correct ShShaderOutput
-            "compile_options": {"object_code": True, "initialize_uninitialized_locals": True},
-            "print_active_variables": True # Crucial for mapping
-        }
+        translation_template = self.translator_client.prepare_params_template(
+            spec="webgl2",
+            output_format="glsl330", # The C++ side maps this to the correct ShShaderOutput
+            compile_options={"object_code": True, "initialize_uninitialized_locals": True},
+            print_active_variables=True # Crucial for mapping
+        )
 
         translated_vertex_shader = None
         vs_active_vars = None
-        print("Translating Vertex Shader via RPC...")
+        translated_fragment_shader = None
+        fs_active_vars = None
+        # Both translations ride one JSON-RPC batch round trip instead of
+        # two sequential pipe write/readline exchanges.
+        print("Translating Vertex + Fragment Shaders via one RPC batch...")
         try:
-            vs_result = self.translator_client.translate(
-                webgl_vertex_shader_source, "vertex", **translation_params
-            )
+            vs_result, fs_result = self.translator_client.translate_many([
+                {**translation_template, "shader_code_str": webgl_vertex_shader_source,
+                 "shader_type": "vertex",
+                 "filter_active_variables": ["in_vert"]},
+                {**translation_template, "shader_code_str": gles_fragment_shader_string,
+                 "shader_type": "fragment",
+                 "filter_active_variables": ["ShadertoyUBO", "iResolution", "iTime",
+                                             "iTimeDelta", "iFrame", "iMouse"]},
+            ])
             translated_vertex_shader = vs_result["object_code"]
             vs_active_vars = vs_result["active_variables"]
             print("Vertex Shader Info Log:\n", vs_result["info_log"])
-            if not translated_vertex_shader:
-                raise ValueError("Translated vertex shader code is empty but no error was raised.")
-        except Exception as e:
-            print(f"Vertex Shader translation FAILED via RPC: {e}")
-            translated_vertex_shader = """#version 330 core
-                in vec2 in_vert; void main() { gl_Position = vec4(in_vert, 0.0, 1.0); }"""
-
-        translated_fragment_shader = None
-        fs_active_vars = None
-        print("\nTranslating Fragment Shader via RPC...")
-        try:
-            fs_result = self.translator_client.translate(
-                gles_fragment_shader_string, "fragment", **translation_params
-            )
             translated_fragment_shader = fs_result["object_code"]
             fs_active_vars = fs_result["active_variables"]
             print("Fragment Shader Info Log:\n", fs_result["info_log"])
+            if not translated_vertex_shader:
+                raise ValueError("Translated vertex shader code is empty but no error was raised.")
             if not translated_fragment_shader:
                  raise ValueError("Translated fragment shader code is empty but no error was raised.")
         except Exception as e:
-            print(f"Fragment Shader translation FAILED via RPC: {e}")
+            print(f"Shader translation FAILED via RPC: {e}")
+            if not translated_vertex_shader:
+                translated_vertex_shader = """#version 330 core
+                    in vec2 in_vert; void main() { gl_Position = vec4(in_vert, 0.0, 1.0); }"""
             translated_fragment_shader = """#version 330 core
                 uniform float iTime; in vec2 v_frag_coord_uv; out vec4 fragColor;
                 void main() { fragColor = vec4(v_frag_coord_uv, 0.5 + 0.5*sin(iTime), 1.0); }"""
@@ -403,42 +851,28 @@ void main() {{
                         # For shadertoy, uniforms are typically global/standalone from GLSL ES perspective
                         all_active_uniform_like_vars.extend(ubo["fields"])
         
-        if all_active_uniform_like_vars:
-            for st_uniform_name in shadertoy_uniform_names:
-                found_angle_uniform = None
-                for angle_var in all_active_uniform_like_vars:
-                    if angle_var and angle_var.get("name") == st_uniform_name:
-                        found_angle_uniform = angle_var
-                        break
-                
-                if found_angle_uniform:
-                    mapped_name = found_angle_uniform.get("mapped_name", st_uniform_name)
-                    try:
-                        self.uniforms[st_uniform_name] = self.program[mapped_name]
-                        # print(f"  Mapped Shadertoy uniform '{st_uniform_name}' to ANGLE's '{mapped_name}' (Location: {self.uniforms[st_uniform_name].location})")
-                    except KeyError:
-                        print(f"  Warning: ANGLE reported uniform '{st_uniform_name}' (mapped: '{mapped_name}'), but not found in ModernGL program.")
-                else:
-                    # Fallback for uniforms ANGLE might not report if optimized out or if mainImage itself is complex
-                    # print(f"  Warning: Shadertoy uniform '{st_uniform_name}' not in active_variables. Trying direct/guessed names.")
-                    try: self.uniforms[st_uniform_name] = self.program[st_uniform_name]
-                    except KeyError: 
-                        try: self.uniforms[st_uniform_name] = self.program["_u" + st_uniform_name] # Old guess
-                        except KeyError:
-                             print(f"    Uniform '{st_uniform_name}' NOT found in program (via active_vars or guesses).")
-        else:
+        # One pass over active_variables builds angle name -> mapped name,
+        # then each Shadertoy uniform is a constant-time lookup with the
+        # direct and legacy '_u' guesses as ordered fallbacks.
+        if not all_active_uniform_like_vars:
             print("\nWarning: No 'active_variables' for fragment shader uniforms. Using fallback guessing for all.")
-            for st_uniform_name in shadertoy_uniform_names:
-                 try: self.uniforms[st_uniform_name] = self.program[st_uniform_name]
-                 except KeyError: 
-                    try: self.uniforms[st_uniform_name] = self.program["_u" + st_uniform_name]
-                    except KeyError: print(f"  Fallback uniform '{st_uniform_name}' NOT found.")
+        angle_map = {
+            var["name"]: var.get("mapped_name", var["name"])
+            for var in all_active_uniform_like_vars if var and "name" in var
+        }
+        for st_uniform_name in shadertoy_uniform_names:
+            mapped_name = angle_map.get(st_uniform_name, st_uniform_name)
+            uniform = (self._get_uniform(mapped_name)
+                       or self._get_uniform(st_uniform_name)
+                       or self._get_uniform("_u" + st_uniform_name))
+            if uniform is not None:
+                self.uniforms[st_uniform_name] = uniform
+            else:
+                print(f"  Uniform '{st_uniform_name}' NOT found in program (via active_vars or guesses).")
 
 
         # Fullscreen quad VBO and VAO
-        quad_vertices = [-1.0, -1.0,  1.0, -1.0,  -1.0,  1.0,   -1.0,  1.0,  1.0, -1.0,  1.0,  1.0]
-        vertex_data = struct.pack(f'{len(quad_vertices)}f', *quad_vertices)
-        self.vbo = self.ctx.buffer(vertex_data)
+        self.vbo = self.ctx.buffer(_QUAD_BYTES)
 
         vs_in_attribute_name = "in_vert" # Default
         if vs_active_vars and vs_active_vars.get("attributes"):
@@ -455,6 +889,49 @@ void main() {{
              self.shutdown_resources()
              exit(1)
 
+        # Upload all Shadertoy state through one std140 UBO: a single
+        # buffer.write per frame instead of five glUniform* calls.
+        # Layout matches the ShadertoyUBO block: vec3+float | vec4 | float, int.
+        self._ubo_buf = bytearray(48)
+        self.ubo = None
+        ubo_block_name = None
+        if fs_active_vars and fs_active_vars.get("uniform_blocks"):
+            for block in fs_active_vars["uniform_blocks"]:
+                if block and block.get("name") == "ShadertoyUBO":
+                    ubo_block_name = block.get("mapped_name", "ShadertoyUBO")
+                    break
+        if ubo_block_name is not None:
+            block = self._get_uniform(ubo_block_name)
+            if block is not None:
+                block.binding = 0
+                self.ubo = self.ctx.buffer(reserve=len(self._ubo_buf))
+                self.ubo.bind_to_uniform_block(0)
+                print(f"Bound uniform block '{ubo_block_name}' to binding 0.")
+
+        # Resolve uniform objects once; render() runs at hundreds of Hz and
+        # shouldn't pay five dict lookups per frame. None means "not in
+        # program" (optimized out), checked with a plain is-not-None test.
+        # These standalone uniforms only exist when the UBO block was
+        # optimized away (e.g. the fallback shaders); they are the backup
+        # upload path.
+        self._u_iResolution = self.uniforms.get("iResolution")
+        self._u_iTime = self.uniforms.get("iTime")
+        self._u_iTimeDelta = self.uniforms.get("iTimeDelta")
+        self._u_iFrame = self.uniforms.get("iFrame")
+        self._u_iMouse = self.uniforms.get("iMouse")
+        self._resolution_tuple = (self.width, self.height, 1.0)  # Never changes
+        # Skip redundant glUniform* calls: iResolution is constant, iMouse
+        # only changes on input. iTime/iTimeDelta/iFrame change every frame
+        # and are always written.
+        self._resolution_uploaded = False
+
+    def _get_uniform(self, name):
+        """Program member lookup that returns None instead of raising."""
+        try:
+            return self.program[name]
+        except KeyError:
+            return None
+
     def get_shadertoy_logic(self):
         # Your original shadertoy_core_logic or a new one
         return """
@@ -488,78 +965,120 @@ void mainImage( out vec4 o, vec2 u )
 }
 """
 
-    def render(self):
+    def render_submit(self):
+        """Issues the frame's GL work without presenting it."""
         self.ctx.clear(0.0, 0.0, 0.0)
-        new_time = time.time()
-        time_delta = new_time - self.last_frame_time
-        if time_delta <= 0: time_delta = 1.0 / 60.0 # Avoid zero or negative delta
-        self.last_frame_time = new_time
-        self.current_time = new_time - self.start_time
-
-        if self.uniforms.get("iResolution"):
-            self.uniforms["iResolution"].value = (self.width, self.height, 1.0)
-        if self.uniforms.get("iTime"):
-            self.uniforms["iTime"].value = self.current_time
-        if self.uniforms.get("iMouse"):
-            self.uniforms["iMouse"].value = tuple(self.mouse_pos)
-        if self.uniforms.get("iFrame"):
-             self.uniforms["iFrame"].value = self.frame_count
-        if self.uniforms.get("iTimeDelta"):
-             self.uniforms["iTimeDelta"].value = time_delta
-
-        self.vao.render(moderngl.TRIANGLES)
+        now_ns = time.perf_counter_ns()
+        time_delta = (now_ns - self._last_ns) * 1e-9
+        self._last_ns = now_ns
+        self.current_time = (now_ns - self._start_ns) * 1e-9
+
+        if self.ubo is not None:
+            mouse = self._mouse_arr
+            struct.pack_into(
+                '<9fi', self._ubo_buf, 0,
+                self.width, self.height, 1.0, self.current_time,
+                mouse[0], mouse[1], mouse[2], mouse[3],
+                time_delta, self.frame_count)
+            self.ubo.write(self._ubo_buf)
+        else:
+            # Fallback when the block was optimized out of the program.
+            if self._u_iResolution is not None and not self._resolution_uploaded:
+                self._u_iResolution.value = self._resolution_tuple
+                self._resolution_uploaded = True
+            if self._u_iTime is not None:
+                self._u_iTime.value = self.current_time
+            if self._u_iMouse is not None and self._mouse_dirty:
+                self._u_iMouse.write(self._mouse_arr)
+                self._mouse_dirty = False
+            if self._u_iFrame is not None:
+                self._u_iFrame.value = self.frame_count
+            if self._u_iTimeDelta is not None:
+                self._u_iTimeDelta.value = time_delta
+
+        self.vao.render(moderngl.TRIANGLE_STRIP, vertices=4)
+
+    def render_present(self):
+        """Flips the backbuffer; blocks on vsync when enabled."""
         pg.display.flip()
         self.frame_count += 1
-    
+
+    def render(self):
+        self.render_submit()
+        self.render_present()
+
     def run(self):
         running = True
         while running:
+            # Submit the frame first, then poll events while the GPU chews
+            # on the quad, and only then flip. Event handling rides under
+            # the vsync/GPU wait instead of adding to frame time.
+            self.render_submit()
+
+            # A release (zw<0) set by last frame's MOUSEBUTTONUP has now
+            # been uploaded by the submit above; clear it before this
+            # frame's events write new state, so the signal lasts exactly
+            # one rendered frame.
+            mouse = self._mouse_arr
+            if mouse[2] < 0.0 or mouse[3] < 0.0:
+                if mouse[2] < 0.0: mouse[2] = 0.0
+                if mouse[3] < 0.0: mouse[3] = 0.0
+                self._mouse_dirty = True
+
+            # Coalesce mouse events: only the last motion/press/release per
+            # frame matters for iMouse, so fast drags don't pay per-event
+            # work (pg.mouse.get_pressed() runs at most once per frame).
+            motion = None
+            btn_down = None
+            btn_up = None
             for event in pg.event.get():
                 if event.type == pg.QUIT:
                     running = False
-                if event.type == pg.KEYDOWN:
+                elif event.type == pg.KEYDOWN:
                     if event.key == pg.K_ESCAPE:
                         running = False
-                # Shadertoy iMouse: xy = current coord, zw = click coord (z<0 means released)
-                current_mouse_pixel = event.pos if event.type in (pg.MOUSEMOTION, pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP) else (self.mouse_pos[0], self.height - 1 - self.mouse_pos[1]) # last known if no event
-                
-                if event.type == pg.MOUSEMOTION:
-                    self.mouse_pos[0] = float(current_mouse_pixel[0])
-                    self.mouse_pos[1] = float(self.height - 1 - current_mouse_pixel[1]) # Invert Y for GL
-                    if pg.mouse.get_pressed()[0]: # If left button is down during motion
-                        self.mouse_pos[2] = self.mouse_pos[0]
-                        self.mouse_pos[3] = self.mouse_pos[1]
-                
-                if event.type == pg.MOUSEBUTTONDOWN:
+                elif event.type == pg.MOUSEMOTION:
+                    motion = event
+                elif event.type == pg.MOUSEBUTTONDOWN:
                     if event.button == 1: # Left mouse button
-                        self.mouse_pos[0] = float(current_mouse_pixel[0])
-                        self.mouse_pos[1] = float(self.height - 1 - current_mouse_pixel[1])
-                        self.mouse_pos[2] = self.mouse_pos[0] # Set click coordinates
-                        self.mouse_pos[3] = self.mouse_pos[1]
-                
-                if event.type == pg.MOUSEBUTTONUP:
-                     if event.button == 1: 
-                        # On release, keep xy as current, make zw negative of last click
-                        # This signals release for one frame as per some Shadertoy conventions
-                        self.mouse_pos[2] = -abs(self.mouse_pos[2]) if self.mouse_pos[2] > 0 else 0.0 
-                        self.mouse_pos[3] = -abs(self.mouse_pos[3]) if self.mouse_pos[3] > 0 else 0.0
-            
-            self.render()
-
-            # After rendering, if zw were negative for release signal, reset them
-            # This means click is only active on the down press and release signal is transient
-            if self.mouse_pos[2] < 0.0: self.mouse_pos[2] = 0.0
-            if self.mouse_pos[3] < 0.0: self.mouse_pos[3] = 0.0
-        
+                        btn_down = event
+                elif event.type == pg.MOUSEBUTTONUP:
+                    if event.button == 1:
+                        btn_up = event
+
+            # Shadertoy iMouse: xy = current coord, zw = click coord (z<0 means released)
+            if motion is not None:
+                mouse[0] = float(motion.pos[0])
+                mouse[1] = float(self.height - 1 - motion.pos[1]) # Invert Y for GL
+                if btn_down is None and pg.mouse.get_pressed()[0]: # Dragging with left button held
+                    mouse[2] = mouse[0]
+                    mouse[3] = mouse[1]
+                self._mouse_dirty = True
+            if btn_down is not None:
+                mouse[0] = float(btn_down.pos[0])
+                mouse[1] = float(self.height - 1 - btn_down.pos[1])
+                mouse[2] = mouse[0] # Set click coordinates
+                mouse[3] = mouse[1]
+                self._mouse_dirty = True
+            if btn_up is not None:
+                # On release, keep xy as current, make zw negative of last click
+                # This signals release for one frame as per some Shadertoy conventions
+                mouse[2] = -abs(mouse[2]) if mouse[2] > 0 else 0.0
+                mouse[3] = -abs(mouse[3]) if mouse[3] > 0 else 0.0
+                self._mouse_dirty = True
+
+            self.render_present()
+
         self.shutdown_resources()
 
     def shutdown_resources(self):
         print("Shutting down resources...")
-        if hasattr(self, 'translator_client') and self.translator_client:
-            self.translator_client.shutdown()
+        # The shared translator client deliberately stays warm for the next
+        # ShaderToy instance; atexit shuts it down at interpreter exit.
         # Release ModernGL resources explicitly if needed, though context destruction handles most
         if hasattr(self, 'vao') and self.vao: self.vao.release()
         if hasattr(self, 'vbo') and self.vbo: self.vbo.release()
+        if hasattr(self, 'ubo') and self.ubo: self.ubo.release()
         if hasattr(self, 'program') and self.program: self.program.release()
         if hasattr(self, 'ctx') and self.ctx: self.ctx.release()
         pg.quit()
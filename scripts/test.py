@@ -3,6 +3,21 @@ import base64
 # Add Config and Engine to the wasmtime imports
 from wasmtime import Store, Module, Instance, Linker, Trap, Config, Engine, WasiConfig
 
+# orjson serializes/parses several times faster than the stdlib and works
+# in bytes, which is what the WASM boundary wants anyway.
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+    _loads = json.loads
+
 class ShaderTranslator:
     """
     A Python wrapper for the ANGLE shader translator WASM module.
@@ -50,34 +65,40 @@ class ShaderTranslator:
         print("Module loaded and functions exported successfully.")
 
     # ... the rest of your ShaderTranslator class remains exactly the same ...
-    def _read_string_from_memory(self, ptr: int) -> str:
-        """Helper to read a null-terminated C-string from WASM memory."""
-        # Read the raw bytes from the pointer onwards
-        memory_data = self.memory.read(self.store, ptr, self.memory.data_len(self.store) - ptr)
-        
-        # Find the null terminator
-        null_terminator_pos = memory_data.find(b'\0')
-        if null_terminator_pos == -1:
-            raise ValueError("String from WASM is not null-terminated")
-            
-        # Decode the bytes up to the terminator as a UTF-8 string
-        return memory_data[:null_terminator_pos].decode('utf-8')
-
-    def _write_string_to_memory(self, s: str) -> int:
-        """Helper to write a Python string into WASM memory, returns the pointer."""
-        s_bytes = s.encode('utf-8')
+    def _read_bytes_from_memory(self, ptr: int) -> bytes:
+        """Helper to read a null-terminated byte string from WASM memory."""
+        # Read in geometrically growing chunks instead of copying the entire
+        # remaining linear memory just to find the terminator: responses are
+        # KB-sized while the heap can be tens of MB.
+        data_len = self.memory.data_len(self.store)
+        chunk_size = 4096
+        parts = []
+        pos = ptr
+        while pos < data_len:
+            stop = min(pos + chunk_size, data_len)
+            chunk = self.memory.read(self.store, pos, stop)
+            null_terminator_pos = chunk.find(b'\0')
+            if null_terminator_pos != -1:
+                parts.append(chunk[:null_terminator_pos])
+                # The JSON parser takes bytes directly; no str round trip
+                return b"".join(parts)
+            parts.append(chunk)
+            pos = stop
+            chunk_size *= 2
+        raise ValueError("String from WASM is not null-terminated")
+
+    def _write_string_to_memory(self, s) -> int:
+        """Helper to write a Python string (or bytes) into WASM memory, returns the pointer."""
+        s_bytes = s.encode('utf-8') if isinstance(s, str) else s
         
         # 1. Allocate memory in WASM (+1 for the null terminator)
         ptr = self._malloc(self.store, len(s_bytes) + 1)
         if not ptr:
             raise MemoryError("WASM malloc failed to allocate memory.")
-            
-        # 2. Write the string's bytes to the allocated memory
-        self.memory.write(self.store, s_bytes, ptr)
-        
-        # 3. Write the null terminator at the end of the string
-        self.memory.write(self.store, b'\0', ptr + len(s_bytes))
-        
+
+        # 2. Write the payload and its null terminator in one host call
+        self.memory.write(self.store, s_bytes + b'\0', ptr)
+
         return ptr
 
     def translate_shader(self, shader_code: str, shader_type: str, spec: str = "webgl", output: str = "essl", print_vars: bool = True) -> dict:
@@ -113,12 +134,12 @@ class ShaderTranslator:
             }
         }
         
-        request_str = json.dumps(request_payload)
+        request_bytes = _dumps(request_payload)
         request_ptr = 0
-        
+
         try:
-            # Write the request string into WASM memory
-            request_ptr = self._write_string_to_memory(request_str)
+            # Write the request bytes into WASM memory
+            request_ptr = self._write_string_to_memory(request_bytes)
             
             # Call the main 'invoke' function with the pointer
             result_ptr = self._invoke(self.store, request_ptr)
@@ -127,14 +148,14 @@ class ShaderTranslator:
                 raise RuntimeError("WASM invoke function returned a null pointer.")
             
             # Read the JSON response string back from WASM memory
-            response_str = self._read_string_from_memory(result_ptr)
+            response_bytes = self._read_bytes_from_memory(result_ptr)
             
         finally:
             # CRITICAL: Always free the memory we allocated for the request string
             if request_ptr:
                 self._free(self.store, request_ptr)
 
-        return json.loads(response_str)
+        return _loads(response_bytes)
 
 
 # --- Main execution ---
@@ -1,5 +1,5 @@
 # src/angle_translator/__init__.py
 
-from .translator import ShaderTranslator
+from .translator import ShaderTranslator, TranslateResult, translate_shaders_parallel
 
-__all__ = ["ShaderTranslator"]
\ No newline at end of file
+__all__ = ["ShaderTranslator", "TranslateResult", "translate_shaders_parallel"]
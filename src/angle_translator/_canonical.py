@@ -0,0 +1,43 @@
+# src/angle_translator/_canonical.py
+
+"""
+Source canonicalization for translation-cache keys.
+
+Cosmetic permutations of the same shader — indentation changes, comment
+edits, trailing whitespace — produce byte-identical ANGLE output, but a
+cache keyed on the raw source treats each one as a fresh compile. Keys
+are therefore computed over a canonical form with comments stripped and
+horizontal whitespace collapsed.
+
+Line structure is deliberately preserved (block comments keep their
+newlines, blank lines stay): ANGLE's info_log reports line numbers, so
+collapsing lines would let one variant's cached log claim wrong lines
+for another. That keeps the dedup strictly cosmetic and correctness-free
+at the cost of not merging edits that move code between lines.
+"""
+
+import re
+
+# Both comment styles in one alternation, so whichever opener appears
+# first in the text wins — a `/*` inside a `//` comment (or `//` inside
+# `/* */`) is plain comment text, never a second opener. Matches are
+# replaced by their contained newlines (or a single space when they sit
+# within one line, so `a/*x*/b` stays two tokens).
+_COMMENT = re.compile(r'/\*.*?\*/|//[^\n]*', re.S)
+_HORIZONTAL_WS = re.compile(r'[ \t]+')
+
+
+def _strip_comment(match) -> str:
+    return '\n' * match.group().count('\n') or ' '
+
+
+def canonicalize(src: str) -> str:
+    """
+    Returns the cache-canonical form of GLSL source: comments removed,
+    runs of spaces/tabs collapsed to one space, lines stripped, line
+    numbering unchanged. GLSL has no string literals, so the single
+    comment pass needs no further lexing.
+    """
+    src = _COMMENT.sub(_strip_comment, src)
+    return '\n'.join(
+        _HORIZONTAL_WS.sub(' ', line).strip() for line in src.split('\n'))
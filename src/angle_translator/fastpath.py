@@ -0,0 +1,74 @@
+# src/angle_translator/fastpath.py
+
+"""
+Opt-in fast path for WebGL -> ESSL translations that need no rewriting.
+
+For spec="webgl" / output="essl", ANGLE's output is often textually close
+to the input: the full pipeline mostly validates and renames. When a
+shader provably uses nothing that forces a rewrite, the source can be
+returned as the object code without entering the wasm module at all.
+
+The scanner is deliberately conservative — any preprocessor directive,
+non-builtin gl_* identifier, or feature outside the WebGL 1 ESSL subset
+falls back to ANGLE (return None), so the complex path is unchanged.
+
+Two caveats, which is why this is opt-in rather than wired into
+ShaderTranslator: the passthrough performs no validation (an invalid
+shader is returned as-is instead of producing a compile error), and it
+skips ANGLE's name mangling, so a passthrough stage must not be linked
+against a stage whose varyings went through ANGLE. Typical use::
+
+    result = try_essl_passthrough(src) or translator.translate_shader(src, "fragment")
+"""
+
+import re
+
+from ._canonical import canonicalize
+from .translator import TranslateResult
+
+# Builtins ANGLE leaves untouched in WebGL 1 ESSL output. Any other gl_*
+# identifier (gl_FragData, gl_DepthRange, user abuse of the prefix, ...)
+# routes to ANGLE, which knows how to rewrite or reject it.
+_PASSTHROUGH_BUILTINS = frozenset((
+    "gl_Position", "gl_PointSize",
+    "gl_FragColor", "gl_FragCoord", "gl_FrontFacing", "gl_PointCoord",
+))
+
+_GL_IDENTIFIER = re.compile(r'\bgl_\w+')
+_DIRECTIVE = re.compile(r'^\s*#', re.M)
+# Anything outside the WebGL 1 ESSL subset (or reserved for later GLSL
+# versions) means ANGLE has rewriting/validation work to do.
+_NEEDS_ANGLE = re.compile(
+    r'\b(?:[iu]sampler\w*|sampler3D|texelFetch\w*|layout|switch|'
+    r'\bin\b|\bout\b|flat|centroid|invariant)\b')
+_FLOAT_PRECISION = re.compile(r'\bprecision\s+(?:lowp|mediump|highp)\s+float\b')
+
+
+def try_essl_passthrough(shader_code: str, shader_type: str = "fragment",
+                         spec: str = "webgl", output: str = "essl"):
+    """
+    Returns a TranslateResult echoing `shader_code` when it is already
+    valid WebGL 1 ESSL that ANGLE would not need to rewrite, or None when
+    the shader must go through the full translator.
+    """
+    if spec != "webgl" or output != "essl":
+        return None
+    canonical = canonicalize(shader_code)
+    if _DIRECTIVE.search(canonical):
+        return None
+    if _NEEDS_ANGLE.search(canonical):
+        return None
+    for name in _GL_IDENTIFIER.findall(canonical):
+        if name not in _PASSTHROUGH_BUILTINS:
+            return None
+    # A fragment shader without a default float precision fails ESSL
+    # compilation as soon as it touches a float; let ANGLE report that.
+    if shader_type == "fragment" and not _FLOAT_PRECISION.search(canonical):
+        return None
+    return TranslateResult(
+        object_code=shader_code,
+        object_code_base64=None,
+        info_log="",
+        active_variables=None,
+        error_code=0,
+    )
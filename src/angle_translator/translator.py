@@ -1,38 +1,313 @@
 # src/angle_translator/translator.py
 
 import json
-import base64
-from wasmtime import Store, Module, Instance, Linker, Trap, Config, Engine, WasiConfig
+import copy
+import ctypes
+import functools
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from wasmtime import Store, Module, Instance, Linker, Trap, Config, Engine, WasiConfig, WasmtimeError
+
+from ._canonical import canonicalize
 
 try:
     from importlib.resources import files, as_file
 except ImportError:
     from importlib_resources import files, as_file
 
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+    _loads = json.loads
+
+try:
+    # SIMD base64 (libbase64); only exercised on the legacy
+    # shader_code_base64 fallback paths for old wasm builds.
+    from pybase64 import b64decode as _b64decode, b64encode as _b64encode
+except ImportError:
+    from base64 import b64decode as _b64decode, b64encode as _b64encode
+
+try:
+    # libc memchr gives a bounded, SIMD NUL scan over linear memory; on
+    # platforms without CDLL(None) the reader falls back to an unbounded
+    # strlen via ctypes.string_at.
+    _libc = ctypes.CDLL(None)
+    _libc.memchr.restype = ctypes.c_void_p
+    _libc.memchr.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_size_t]
+except (OSError, AttributeError):
+    _libc = None
+
+
+def _make_engine_config() -> Config:
+    """
+    Builds the wasmtime Config used for the ANGLE module: Cranelift at the
+    'speed' opt level, with wasmtime's on-disk code cache enabled so repeated
+    compilations of the same wasm are served from disk.
+    """
+    config = Config()
+    # The current CMake build compiles ANGLE with -fno-exceptions, but the
+    # packaged wasm artifact predates that and still carries
+    # exception-handling opcodes, so the proposal must stay enabled for it
+    # to validate. Wasmtime only pays for EH in functions that use it, so
+    # this costs nothing once the artifact is rebuilt without exceptions.
+    config.wasm_exceptions = True
+    config.strategy = "cranelift"
+    config.cranelift_opt_level = "speed"
+    # Shader translation has no IEEE-sensitive float behavior to preserve;
+    # skipping NaN canonicalization avoids extra instructions around every
+    # float op. False is wasmtime's default — stated here so it survives any
+    # future "turn everything on" config sweep.
+    config.cranelift_nan_canonicalization = False
+    try:
+        # Wasmtime's default cache config; harmless to skip if the host
+        # build was compiled without cache support.
+        config.cache = True
+    except WasmtimeError:
+        pass
+    try:
+        # Long-lived translator: reserve the full 4 GiB index space plus a
+        # 2 GiB guard region so linear-memory accesses compile to bare
+        # loads/stores with no bounds checks, keep data segments CoW-mapped
+        # from the module, and pin the memory so growth never relocates it.
+        config.memory_reservation = 1 << 32
+        config.memory_guard_size = 2 << 30
+        config.memory_init_cow = True
+        config.memory_may_move = False
+    except WasmtimeError:
+        pass  # 32-bit hosts or constrained address space; defaults are fine
+    return config
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_engine() -> Engine:
+    """
+    One Engine for the whole process. Engines own the compiled-code and
+    allocation machinery, so sharing one lets every ShaderTranslator reuse
+    the same compiled module pages instead of paying per-instance
+    mmap/mprotect setup. (wasmtime-py does not expose the pooling
+    allocator; a shared Engine is the closest equivalent its API offers.)
+    """
+    return Engine(_make_engine_config())
+
+
+# Content hash of the loaded wasm module, set by _load_module(). Persistent
+# cache directories are suffixed with it so a rebuilt translator never serves
+# results produced by an older build.
+_wasm_build_id = None
+
+
+def _load_module(engine: Engine, wasm_path) -> Module:
+    """
+    Loads the ANGLE wasm module, preferring an AOT-precompiled `.cwasm`
+    artifact stored next to the wasm file. The artifact name embeds a hash of
+    the wasm bytes, so editing/rebuilding the wasm automatically invalidates
+    old artifacts. Falls back to in-memory compilation when the directory is
+    not writable (e.g. a read-only site-packages install).
+    """
+    global _wasm_build_id
+    wasm_bytes = wasm_path.read_bytes()
+    digest = hashlib.blake2b(wasm_bytes, digest_size=16).hexdigest()
+    _wasm_build_id = digest
+    cwasm_path = wasm_path.parent / f"{wasm_path.stem}-{digest}.cwasm"
+
+    if cwasm_path.is_file():
+        try:
+            return Module.deserialize_file(engine, str(cwasm_path))
+        except WasmtimeError:
+            pass  # stale/corrupt artifact (e.g. wasmtime upgrade); recompile
+
+    module = Module(engine, wasm_bytes)
+    try:
+        tmp_path = cwasm_path.with_suffix(".tmp")
+        tmp_path.write_bytes(module.serialize())
+        os.replace(tmp_path, cwasm_path)
+    except OSError:
+        pass  # read-only install; keep the in-memory module
+    return module
+
+
+@functools.lru_cache(maxsize=None)
+def _get_module(engine: Engine) -> Module:
+    """
+    One compiled Module per engine. Compilation (or `.cwasm`
+    deserialization) runs at most once per process; later ShaderTranslator
+    constructions reuse the same Module and only pay for instantiation.
+    """
+    wasm_file_traversable = files('angle_translator').joinpath('wasm', 'angle_shader_translator_standalone.wasm')
+    with as_file(wasm_file_traversable) as wasm_path:
+        return _load_module(engine, wasm_path)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_instance_pre(engine: Engine):
+    """
+    Pre-linked instantiation template for the ANGLE module. The Linker
+    resolves and type-checks the WASI imports once per process; each
+    ShaderTranslator then instantiates from the template, which is much
+    cheaper than re-running full linking per construction.
+    """
+    linker = Linker(engine)
+    linker.define_wasi()
+    return linker.instantiate_pre(_get_module(engine))
+
+
+# Process-wide translation-result cache, shared by every ShaderTranslator
+# (and therefore by all translate_shaders_parallel workers): identical
+# sources translated through different instances hit the same entries.
+# Keys are content hashes of (source, type, spec, output, flags); the LRU
+# bound comes from each instance's cache_size argument.
+_result_cache = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class TranslateResult:
+    """
+    Flat, immutable record of one translation.
+
+    One slotted record replaces the nested JSON-RPC dict tree
+    (``response["result"]["object_code"]``, ``response["error"]["data"]``
+    and so on), so handing a result to the caller allocates a single object
+    instead of a handful of dicts and keys. ``error_code`` is 0 on success;
+    on failure it carries the JSON-RPC error code (e.g. -32002 for compile
+    failures) and ``info_log`` holds the compiler log.
+    """
+    __slots__ = ("object_code", "object_code_base64", "info_log",
+                 "active_variables", "error_code")
+
+    object_code: "str | bytes | None"
+    object_code_base64: "str | None"
+    info_log: str
+    active_variables: "dict | None"
+    error_code: int
+
+    @classmethod
+    def from_response(cls, response: dict) -> "TranslateResult":
+        """Builds a record from a JSON-RPC response dict (result or error)."""
+        error = response.get("error")
+        if error is not None:
+            data = error.get("data") or {}
+            return cls(
+                object_code=None,
+                object_code_base64=None,
+                info_log=data.get("info_log", ""),
+                active_variables=None,
+                error_code=error.get("code", -32000),
+            )
+        result = response.get("result") or {}
+        return cls(
+            object_code=result.get("object_code"),
+            object_code_base64=result.get("object_code_base64"),
+            info_log=result.get("info_log", ""),
+            active_variables=result.get("active_variables"),
+            error_code=0,
+        )
+
+    def to_dict(self) -> dict:
+        """Rebuilds the nested JSON-RPC-style payload for callers that need it."""
+        if self.error_code:
+            return {"error": {"code": self.error_code,
+                              "data": {"info_log": self.info_log}}}
+        result = {"info_log": self.info_log}
+        if self.object_code is not None:
+            result["object_code"] = self.object_code
+        if self.object_code_base64 is not None:
+            result["object_code_base64"] = self.object_code_base64
+        if self.active_variables is not None:
+            result["active_variables"] = self.active_variables
+        return {"result": result}
+
+
+# Pre-encoded request skeletons for the source forms whose variable fields
+# are JSON-safe by construction (integers, base64 output, enum-like
+# tokens). They skip the dict build and serializer walk on the hot path;
+# the plain shader_code form still uses the serializer because the source
+# itself needs JSON escaping.
+_STAGED_REQUEST_TEMPLATE = (
+    b'{"jsonrpc":"2.0","id":1,"method":"translate","params":{'
+    b'"shader_ptr":%d,"shader_len":%d,"shader_type":"%s","spec":"%s",'
+    b'"output":"%s","print_active_variables":%s,'
+    b'"compile_options":{"objectCode":true},'
+    b'"resources":{"EnableNameHashing":%s}}}'
+)
+
+_B64_REQUEST_TEMPLATE = (
+    b'{"jsonrpc":"2.0","id":1,"method":"translate","params":{'
+    b'"shader_code_base64":"%s","shader_type":"%s","spec":"%s",'
+    b'"output":"%s","print_active_variables":%s,'
+    b'"compile_options":{"objectCode":true},'
+    b'"resources":{"EnableNameHashing":%s}}}'
+)
+
+
+def _json_safe_token(s: str) -> bool:
+    """True when `s` can be embedded in a JSON string without escaping."""
+    return s.isascii() and '"' not in s and '\\' not in s and not any(ord(c) < 0x20 for c in s)
+
+
 class ShaderTranslator:
     """
     A Python wrapper for the ANGLE shader translator WASM module.
     This class provides both a context manager and an explicit .close() method
     for guaranteed, safe resource cleanup.
     """
-    def __init__(self):
+
+    # Whether the loaded wasm module accepts the plain 'shader_code' request
+    # field (None = not probed yet). Probed once and shared process-wide.
+    _plain_source_supported = None
+
+    # Whether the loaded wasm module accepts 'shader_ptr'/'shader_len'
+    # (source staged directly in linear memory, no base64 and no JSON
+    # escaping). Probed once and shared process-wide.
+    _staging_supported = None
+
+    # Initial size of the reusable request buffer in WASM memory; grown
+    # on demand for larger payloads.
+    _SCRATCH_INITIAL_SIZE = 64 * 1024
+
+    # Whether the loaded wasm module accepts JSON-RPC 2.0 batch arrays
+    # (None = not probed yet). Probed once and shared process-wide.
+    _batch_supported = None
+
+    def __init__(self, cache_size: int = 256, cache_dir: str = None):
+        """
+        Args:
+            cache_size (int): Maximum number of translation results kept in
+                              the process-wide in-memory cache, which is
+                              shared across instances. 0 disables cache use
+                              for this instance.
+            cache_dir (str, optional): Directory for a persistent translation
+                                       cache. Results are stored as one JSON
+                                       file per request hash, in a
+                                       per-wasm-build subdirectory, and
+                                       survive process restarts. None
+                                       disables it.
+        """
         self._closed = False  # Add a flag to track cleanup state
-        
-        config = Config()
-        config.wasm_exceptions = True
-        self.store = Store(Engine(config))
+        self._cache_size = cache_size
+        self._cache_dir = None
+
+        self.store = Store(_shared_engine())
 
         # ... (The rest of __init__ is the same)
         wasi_config = WasiConfig()
         wasi_config.argv = []
         wasi_config.env = []
         self.store.set_wasi(wasi_config)
-        linker = Linker(self.store.engine)
-        linker.define_wasi()
-        wasm_file_traversable = files('angle_translator').joinpath('wasm', 'angle_shader_translator_standalone.wasm')
-        with as_file(wasm_file_traversable) as wasm_path:
-            self.module = Module(self.store.engine, wasm_path.read_bytes())
-        self.instance = linker.instantiate(self.store, self.module)
+        self.module = _get_module(self.store.engine)
+        self.instance = _get_instance_pre(self.store.engine).instantiate(self.store)
         self.exports = self.instance.exports(self.store)
         self.memory = self.exports["memory"]
         self._malloc = self.exports["malloc"]
@@ -44,12 +319,42 @@ class ShaderTranslator:
         if not self._initialize(self.store):
              raise RuntimeError("CRITICAL: The ANGLE library failed to initialize.")
 
+        # The persistent cache lives under a subdirectory named after the
+        # wasm build hash (known once the module is loaded above), so
+        # upgrading the packaged translator automatically invalidates stale
+        # entries instead of serving output from an older ANGLE build.
+        if cache_dir:
+            self._cache_dir = os.path.join(cache_dir, f"wasm-{_wasm_build_id}")
+            os.makedirs(self._cache_dir, exist_ok=True)
+
+        # Request scratch buffer inside WASM linear memory, reused across
+        # translate calls so the common path pays no malloc/free host calls.
+        self._scratch_ptr = 0
+        self._scratch_cap = 0
+        self._ensure_scratch(self._SCRATCH_INITIAL_SIZE)
+
+        # Separate staging buffer for raw shader source. Kept apart from the
+        # request scratch because the JSON request referencing it is written
+        # while the staged bytes must remain intact. Allocated on first use.
+        self._stage_ptr = 0
+        self._stage_cap = 0
+
     def close(self):
             """
             Safely finalizes the ANGLE library and releases all wasmtime resources
             to ensure a clean shutdown.
             """
             if not self._closed:
+                # Return the reusable buffers before tearing down.
+                if getattr(self, '_scratch_ptr', 0) and hasattr(self, '_free'):
+                    self._free(self.store, self._scratch_ptr)
+                    self._scratch_ptr = 0
+                    self._scratch_cap = 0
+                if getattr(self, '_stage_ptr', 0) and hasattr(self, '_free'):
+                    self._free(self.store, self._stage_ptr)
+                    self._stage_ptr = 0
+                    self._stage_cap = 0
+
                 # Finalize the C++ ANGLE library first
                 if hasattr(self, '_finalize') and self._finalize:
                     self._finalize(self.store)
@@ -82,7 +387,7 @@ class ShaderTranslator:
         self.close()
 
     # All other methods (translate_shader, etc.) are unchanged.
-    def translate_shader(self, shader_code: str, shader_type: str, spec: str = "webgl", output: str = "essl", print_vars: bool = True, enable_name_hashing: bool = False) -> dict:
+    def translate_shader(self, shader_code: str, shader_type: str, spec: str = "webgl", output: str = "essl", print_vars: bool = True, enable_name_hashing: bool = False) -> TranslateResult:
         """
         Translates shader code using the ANGLE shader translator WASM module.
 
@@ -113,6 +418,10 @@ class ShaderTranslator:
             print_vars (bool, optional): If True, the response will include a detailed
                                          `active_variables` dictionary showing attributes,
                                          uniforms, varyings, and output variables. Defaults to True.
+                                         Reflection is collected, serialized and decoded
+                                         eagerly inside the wasm call — there is no lazy
+                                         access across the JSON boundary — so pass False
+                                         on hot paths that never read it.
             enable_name_hashing (bool, optional): Controls whether ANGLE's internal name hashing
                                                   mechanism is active. Defaults to False.
                                                   - If `True`: ANGLE will generate unique names
@@ -124,68 +433,459 @@ class ShaderTranslator:
                                                     prefixing names with '_u' (e.g., `myUniform -> _umyUniform`).
 
         Returns:
-            dict: A dictionary containing the translation result.
-                  On success, this typically includes:
-                  - 'info_log' (str): Compilation log messages (warnings, errors).
-                  - 'object_code' (str): The translated shader code (for text outputs).
-                  - 'object_code_base64' (str): Base64 encoded binary shader (for 'spirv' output).
-                  - 'active_variables' (dict, if print_vars=True): Details of active shader variables.
-                  
-                  On failure (e.g., invalid parameters or compilation error), it will contain
-                  an 'error' key with details. You should check for the presence of this key
-                  in the returned dictionary to handle errors.
+            TranslateResult: A flat, immutable record of the translation.
+                  On success, `object_code` (text outputs) or
+                  `object_code_base64` (binary outputs) holds the translated
+                  shader, `active_variables` is populated when
+                  print_vars=True, and `error_code` is 0. On failure,
+                  `error_code` carries the JSON-RPC error code and
+                  `info_log` the compiler log. Use `.to_dict()` where the
+                  nested JSON-RPC payload shape is needed.
 
         Raises:
             RuntimeError: If the translator has been closed or if the WASM invocation
                           returns a null pointer.
             json.JSONDecodeError: If the response from WASM is not valid JSON.
         """
+        return TranslateResult.from_response(self._translate_shader_dict(
+            shader_code, shader_type, spec, output, print_vars, enable_name_hashing))
+
+    def _translate_shader_dict(self, shader_code: str, shader_type: str, spec: str = "webgl", output: str = "essl", print_vars: bool = True, enable_name_hashing: bool = False) -> dict:
+        """
+        Single-shot translation returning the raw JSON-RPC response dict.
+
+        Backs translate_shader and the dict-shaped batch/parallel APIs;
+        results are cached (including on disk) in this JSON-friendly form.
+        """
         if self._closed:
             raise RuntimeError("Translator has been closed and cannot be used.")
-        shader_code_b64 = base64.b64encode(shader_code.encode('utf-8')).decode('utf-8')
+        cache_key = self._cache_key(shader_code, shader_type, spec, output, print_vars, enable_name_hashing)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
 
         # Build the resources dictionary
         resources_params = {}
         # Add other resources as needed
         resources_params["EnableNameHashing"] = enable_name_hashing
 
-        request_payload = {
-            "jsonrpc": "2.0", "id": 1, "method": "translate",
-            "params": {
-                "shader_code_base64": shader_code_b64, 
-                "shader_type": shader_type,
-                "spec": spec, 
-                "output": output, 
-                "print_active_variables": print_vars,
-                "compile_options": {"objectCode": True},
-                "resources": resources_params,
-            }
+        params = {
+            "shader_type": shader_type,
+            "spec": spec,
+            "output": output,
+            "print_active_variables": print_vars,
+            "compile_options": {"objectCode": True},
+            "resources": resources_params,
         }
-        request_str = json.dumps(request_payload)
-        request_ptr = 0
-        try:
-            request_ptr = self._write_string_to_memory(request_str)
-            result_ptr = self._invoke(self.store, request_ptr)
-            if not result_ptr:
-                raise RuntimeError("WASM invoke function returned a null pointer.")
-            response_str = self._read_string_from_memory(result_ptr)
-        finally:
-            if request_ptr:
-                self._free(self.store, request_ptr)
-        return json.loads(response_str)
+
+        response = None
+        if ShaderTranslator._staging_supported is not False:
+            # Fastest path: stage the raw source bytes in linear memory and
+            # send only their location, so the source crosses the boundary
+            # exactly once with no base64 and no JSON string escaping.
+            response = self._invoke_staged(shader_code, params)
+            if self._is_missing_source_error(response):
+                # Older wasm build without staging support; remember that
+                # for the rest of the process.
+                ShaderTranslator._staging_supported = False
+                response = None
+            else:
+                ShaderTranslator._staging_supported = True
+
+        if response is None and ShaderTranslator._plain_source_supported is not False:
+            # Preferred path: send the source as a plain JSON string and let
+            # JSON escaping do the work, skipping the base64 encode here and
+            # the matching decode inside the wasm module.
+            response = self._invoke_request({
+                "jsonrpc": "2.0", "id": 1, "method": "translate",
+                "params": dict(params, shader_code=shader_code),
+            })
+            if self._is_missing_source_error(response):
+                # Older wasm build that only understands the base64 field;
+                # remember that for the rest of the process.
+                ShaderTranslator._plain_source_supported = False
+                response = None
+            else:
+                ShaderTranslator._plain_source_supported = True
+
+        if response is None:
+            shader_code_b64 = _b64encode(shader_code.encode('utf-8'))
+            if _json_safe_token(shader_type) and _json_safe_token(spec) and _json_safe_token(output):
+                response = self._invoke_request_bytes(_B64_REQUEST_TEMPLATE % (
+                    shader_code_b64,
+                    shader_type.encode('ascii'), spec.encode('ascii'), output.encode('ascii'),
+                    b"true" if print_vars else b"false",
+                    b"true" if enable_name_hashing else b"false",
+                ))
+            else:
+                response = self._invoke_request({
+                    "jsonrpc": "2.0", "id": 1, "method": "translate",
+                    "params": dict(params, shader_code_base64=shader_code_b64.decode('ascii')),
+                })
+
+        self._cache_put(cache_key, response)
+        return response
+
+    def translate_shader_raw(self, shader_code: str, shader_type: str, spec: str = "webgl", output: str = "spirv", print_vars: bool = True, enable_name_hashing: bool = False) -> TranslateResult:
+        """
+        Like translate_shader, but returns binary object code as raw bytes.
+
+        Newer wasm builds honour a 'binary_object_code' flag and report the
+        blob's location in linear memory, which is copied out directly with
+        no base64 encode or decode on either side. Older builds that ignore
+        the flag still return 'object_code_base64'; it is decoded host-side
+        so callers always find bytes under `object_code`.
+
+        Returns:
+            TranslateResult: Same shape as translate_shader's return value,
+                  except that for binary outputs `object_code` is a bytes
+                  object and `object_code_base64` is None.
+        """
+        if self._closed:
+            raise RuntimeError("Translator has been closed and cannot be used.")
+        cache_key = self._cache_key(shader_code, shader_type, spec, output + "#raw", print_vars, enable_name_hashing)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return TranslateResult.from_response(cached)
+
+        params = {
+            "shader_type": shader_type,
+            "spec": spec,
+            "output": output,
+            "print_active_variables": print_vars,
+            "compile_options": {"objectCode": True},
+            "resources": {"EnableNameHashing": enable_name_hashing},
+            "binary_object_code": True,
+        }
+
+        response = None
+        if ShaderTranslator._plain_source_supported is not False:
+            response = self._invoke_request({
+                "jsonrpc": "2.0", "id": 1, "method": "translate",
+                "params": dict(params, shader_code=shader_code),
+            })
+            if self._is_missing_source_error(response):
+                ShaderTranslator._plain_source_supported = False
+                response = None
+            else:
+                ShaderTranslator._plain_source_supported = True
+
+        if response is None:
+            shader_code_b64 = _b64encode(shader_code.encode('utf-8'))
+            response = self._invoke_request({
+                "jsonrpc": "2.0", "id": 1, "method": "translate",
+                "params": dict(params, shader_code_base64=shader_code_b64.decode('ascii')),
+            })
+
+        result = response.get("result")
+        if isinstance(result, dict):
+            if "object_code_ptr" in result:
+                # The blob lives in linear memory until the next invoke();
+                # copy it out now.
+                ptr = result.pop("object_code_ptr")
+                length = result.pop("object_code_len", 0)
+                result["object_code"] = bytes(self.memory.read(self.store, ptr, ptr + length))
+            elif result.get("object_code_base64") is not None:
+                # Legacy wasm without pointer support: decode once here.
+                result["object_code"] = _b64decode(result.pop("object_code_base64"))
+
+        self._cache_put(cache_key, response)
+        return TranslateResult.from_response(response)
+
+    def translate_shader_batch(self, shaders: list) -> list:
+        """
+        Translates several shaders in a single WASM invoke.
+
+        Each entry in `shaders` is a dict with the same keys as the
+        translate_shader arguments: 'shader_code' and 'shader_type' are
+        required; 'spec', 'output', 'print_vars' and 'enable_name_hashing'
+        are optional with the same defaults. The requests are sent as one
+        JSON-RPC 2.0 batch array, so N translations pay one boundary
+        crossing and one JSON round trip instead of N.
+
+        Returns:
+            list: One JSON-RPC response dict per entry, in input order —
+                  {"result": {...}} or {"error": {...}} — unlike
+                  translate_shader, which wraps the same payload in a
+                  TranslateResult (use TranslateResult.from_response to
+                  convert an entry). Cached results are reused and new
+                  results are cached individually.
+
+        Falls back to sequential translate_shader calls when the loaded wasm
+        module predates batch support.
+        """
+        if self._closed:
+            raise RuntimeError("Translator has been closed and cannot be used.")
+        results = [None] * len(shaders)
+        pending = []
+        for i, item in enumerate(shaders):
+            key = self._cache_key(
+                item["shader_code"], item["shader_type"],
+                item.get("spec", "webgl"), item.get("output", "essl"),
+                item.get("print_vars", True), item.get("enable_name_hashing", False))
+            cached = self._cache_get(key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, key))
+
+        if not pending:
+            return results
+
+        if ShaderTranslator._batch_supported is not False:
+            plain = ShaderTranslator._plain_source_supported is not False
+            stages = None
+            if ShaderTranslator._staging_supported is True:
+                # Staging support was already confirmed by a single-shot
+                # call, so pack all pending sources into one staging buffer
+                # and reference them by pointer — no base64, no escaping.
+                blobs = [shaders[i]["shader_code"].encode('utf-8') for i, _key in pending]
+                base = self._ensure_stage(max(sum(len(b) for b in blobs), 1))
+                self.memory.write(self.store, b"".join(blobs), base)
+                stages = []
+                offset = base
+                for blob in blobs:
+                    stages.append((offset, len(blob)))
+                    offset += len(blob)
+            batch_request = [
+                self._build_request(shaders[i], rpc_id=pos + 1, plain=plain,
+                                    stage=stages[pos] if stages else None)
+                for pos, (i, _key) in enumerate(pending)
+            ]
+            response = self._invoke_request(batch_request)
+            if isinstance(response, list):
+                ShaderTranslator._batch_supported = True
+                by_id = {r.get("id"): r for r in response if isinstance(r, dict)}
+                complete = all(by_id.get(pos + 1) is not None for pos in range(len(pending)))
+                if complete and plain and any(
+                        self._is_missing_source_error(by_id[pos + 1]) for pos in range(len(pending))):
+                    # Old wasm that parses batches but not plain source.
+                    ShaderTranslator._plain_source_supported = False
+                    complete = False
+                if complete:
+                    for pos, (i, key) in enumerate(pending):
+                        results[i] = by_id[pos + 1]
+                        self._cache_put(key, results[i])
+                    return results
+            else:
+                ShaderTranslator._batch_supported = False
+
+        # Fallback: one request per shader through the single-shot path.
+        for i, _key in pending:
+            item = shaders[i]
+            results[i] = self._translate_shader_dict(
+                item["shader_code"], item["shader_type"],
+                item.get("spec", "webgl"), item.get("output", "essl"),
+                item.get("print_vars", True), item.get("enable_name_hashing", False))
+        return results
+
+    def _build_request(self, item: dict, rpc_id: int, plain: bool, stage: tuple = None) -> dict:
+        params = {
+            "shader_type": item["shader_type"],
+            "spec": item.get("spec", "webgl"),
+            "output": item.get("output", "essl"),
+            "print_active_variables": item.get("print_vars", True),
+            "compile_options": {"objectCode": True},
+            "resources": {"EnableNameHashing": item.get("enable_name_hashing", False)},
+        }
+        if stage is not None:
+            params["shader_ptr"], params["shader_len"] = stage
+        elif plain:
+            params["shader_code"] = item["shader_code"]
+        else:
+            params["shader_code_base64"] = _b64encode(
+                item["shader_code"].encode('utf-8')).decode('ascii')
+        return {"jsonrpc": "2.0", "id": rpc_id, "method": "translate", "params": params}
+
+    @staticmethod
+    def _is_missing_source_error(response: dict) -> bool:
+        error = response.get("error")
+        if not isinstance(error, dict) or error.get("code") != -32602:
+            return False
+        return "shader_code" in error.get("message", "")
+
+    def _invoke_request(self, request_payload):
+        """
+        Sends one JSON-RPC payload through the WASM module and parses the
+        response. The payload may be a single request dict or a batch list;
+        either way it makes exactly one invoke through the shared scratch
+        buffer.
+        """
+        return self._invoke_request_bytes(_dumps(request_payload))
+
+    def _invoke_request_bytes(self, request_bytes: bytes):
+        """Sends pre-serialized JSON-RPC bytes and parses the response."""
+        request_ptr = self._ensure_scratch(len(request_bytes) + 1)
+        self.memory.write(self.store, request_bytes + b'\0', request_ptr)
+        result_ptr = self._invoke(self.store, request_ptr)
+        if not result_ptr:
+            raise RuntimeError("WASM invoke function returned a null pointer.")
+        return _loads(self._read_bytes_from_memory(result_ptr))
+
+    def _invoke_staged(self, shader_code: str, params: dict) -> dict:
+        """Stages the shader source in linear memory and sends its location."""
+        shader_bytes = shader_code.encode('utf-8')
+        stage_ptr = self._ensure_stage(max(len(shader_bytes), 1))
+        if shader_bytes:
+            self.memory.write(self.store, shader_bytes, stage_ptr)
+        stype, spec, output = params["shader_type"], params["spec"], params["output"]
+        if _json_safe_token(stype) and _json_safe_token(spec) and _json_safe_token(output):
+            return self._invoke_request_bytes(_STAGED_REQUEST_TEMPLATE % (
+                stage_ptr, len(shader_bytes),
+                stype.encode('ascii'), spec.encode('ascii'), output.encode('ascii'),
+                b"true" if params["print_active_variables"] else b"false",
+                b"true" if params["resources"]["EnableNameHashing"] else b"false",
+            ))
+        return self._invoke_request({
+            "jsonrpc": "2.0", "id": 1, "method": "translate",
+            "params": dict(params, shader_ptr=stage_ptr, shader_len=len(shader_bytes)),
+        })
+
+    def _ensure_scratch(self, size: int) -> int:
+        """Returns the scratch pointer, growing the buffer if `size` exceeds it."""
+        if size > self._scratch_cap:
+            if self._scratch_ptr:
+                self._free(self.store, self._scratch_ptr)
+                self._scratch_ptr = 0
+                self._scratch_cap = 0
+            ptr = self._malloc(self.store, size)
+            if not ptr:
+                raise MemoryError("WASM malloc failed to allocate memory.")
+            self._scratch_ptr = ptr
+            self._scratch_cap = size
+        return self._scratch_ptr
+
+    def _ensure_stage(self, size: int) -> int:
+        """Returns the staging pointer, growing the buffer if `size` exceeds it."""
+        if size > self._stage_cap:
+            if self._stage_ptr:
+                self._free(self.store, self._stage_ptr)
+                self._stage_ptr = 0
+                self._stage_cap = 0
+            ptr = self._malloc(self.store, size)
+            if not ptr:
+                raise MemoryError("WASM malloc failed to allocate memory.")
+            self._stage_ptr = ptr
+            self._stage_cap = size
+        return self._stage_ptr
+
+    def _cache_key(self, shader_code: str, shader_type: str, spec: str, output: str, print_vars: bool, enable_name_hashing: bool) -> bytes:
+        # Hash the canonical form, so cosmetic permutations of one shader
+        # (comments, indentation) share a single cache entry. The raw
+        # 16-byte digest is the dict key — short, with a constant-cost hash
+        # on every probe — and its hex form names the disk entry.
+        h = hashlib.blake2b(digest_size=16)
+        h.update(canonicalize(shader_code).encode('utf-8'))
+        h.update(f"|{shader_type}|{spec}|{output}|{print_vars}|{enable_name_hashing}".encode('utf-8'))
+        return h.digest()
+
+    def _cache_get(self, key: bytes):
+        if self._cache_size:
+            with _result_cache_lock:
+                if key in _result_cache:
+                    _result_cache.move_to_end(key)
+                    return copy.deepcopy(_result_cache[key])
+        if self._cache_dir:
+            path = os.path.join(self._cache_dir, key.hex() + ".json")
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    response = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if self._cache_size:
+                with _result_cache_lock:
+                    _result_cache[key] = response
+            return copy.deepcopy(response)
+        return None
+
+    def _cache_put(self, key: bytes, response: dict):
+        if self._cache_size:
+            with _result_cache_lock:
+                _result_cache[key] = copy.deepcopy(response)
+                while len(_result_cache) > self._cache_size:
+                    _result_cache.popitem(last=False)
+        if self._cache_dir:
+            path = os.path.join(self._cache_dir, key.hex() + ".json")
+            tmp_path = path + ".tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(response, f)
+                os.replace(tmp_path, path)
+            except (OSError, TypeError):
+                # Cache dir vanished / disk full, or the response holds raw
+                # bytes (translate_shader_raw) that JSON can't encode; the
+                # in-memory cache above still accepted it.
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
 
     def _write_string_to_memory(self, s: str) -> int:
-        s_bytes = s.encode('utf-8')
+        return self._write_bytes_to_memory(s.encode('utf-8'))
+
+    def _write_bytes_to_memory(self, s_bytes: bytes) -> int:
         ptr = self._malloc(self.store, len(s_bytes) + 1)
         if not ptr:
             raise MemoryError("WASM malloc failed to allocate memory.")
-        self.memory.write(self.store, s_bytes, ptr)
-        self.memory.write(self.store, b'\0', ptr + len(s_bytes))
+        self.memory.write(self.store, s_bytes + b'\0', ptr)
         return ptr
 
     def _read_string_from_memory(self, ptr: int) -> str:
-        mem_data = self.memory.read(self.store, ptr, self.memory.data_len(self.store) - ptr)
-        null_term_pos = mem_data.find(b'\0')
-        if null_term_pos == -1:
-            raise ValueError("String from WASM is not null-terminated")
-        return mem_data[:null_term_pos].decode('utf-8')
\ No newline at end of file
+        return self._read_bytes_from_memory(ptr).decode('utf-8')
+
+    def _read_bytes_from_memory(self, ptr: int) -> bytes:
+        """
+        Reads the NUL-terminated response starting at `ptr`. Works directly on
+        the linear-memory buffer, so only the response itself is copied out —
+        not the entire remaining heap, as memory.read(ptr, data_len - ptr)
+        would do.
+        """
+        data_len = self.memory.data_len(self.store)
+        if not 0 <= ptr < data_len:
+            raise ValueError(f"Pointer {ptr} is outside WASM memory (size {data_len}).")
+        base = ctypes.addressof(self.memory.get_buffer_ptr(self.store))
+        if _libc is not None:
+            # Bounded scan: never runs past the end of linear memory even if
+            # the module hands back an unterminated buffer.
+            terminator = _libc.memchr(base + ptr, 0, data_len - ptr)
+            if not terminator:
+                raise ValueError("String from WASM is not null-terminated")
+            return ctypes.string_at(base + ptr, terminator - (base + ptr))
+        return ctypes.string_at(base + ptr)
+
+
+# Per-thread translator used by translate_shaders_parallel. Stores are
+# thread-confined in wasmtime, so each worker owns a full instance; the
+# shared engine/module/InstancePre caches make that cheap after the first.
+_worker_state = threading.local()
+
+
+def _translate_one(item: dict) -> dict:
+    translator = getattr(_worker_state, "translator", None)
+    if translator is None:
+        translator = ShaderTranslator()
+        _worker_state.translator = translator
+    return translator._translate_shader_dict(
+        item["shader_code"], item["shader_type"],
+        item.get("spec", "webgl"), item.get("output", "essl"),
+        item.get("print_vars", True), item.get("enable_name_hashing", False))
+
+
+def translate_shaders_parallel(shaders: list, max_workers: int = None) -> list:
+    """
+    Translates shaders concurrently across a pool of worker threads.
+
+    Each entry in `shaders` is a dict with the same keys
+    translate_shader_batch accepts. Every worker thread lazily builds its
+    own ShaderTranslator (wasmtime Stores are thread-confined) and keeps it
+    for the life of the thread; ctypes releases the GIL while the wasm code
+    runs, so translations genuinely overlap.
+
+    Prefer translate_shader_batch for small sets — one boundary crossing
+    beats thread fan-out until there are enough shaders to fill the cores.
+
+    Returns:
+        list: One response dict per entry, in input order.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_translate_one, shaders))
\ No newline at end of file
@@ -19,6 +19,9 @@ static inline bool is_base64(unsigned char c) {
 
 inline std::string base64_encode(const unsigned char* buf, unsigned int bufLen) {
     std::string ret;
+    // Output size is known exactly up front; reserving avoids the
+    // geometric realloc/copy churn while appending 4 chars at a time.
+    ret.reserve(((static_cast<size_t>(bufLen) + 2) / 3) * 4);
     int i = 0;
     unsigned char char_array_3[3];
     unsigned char char_array_4[4];
@@ -71,6 +74,8 @@ inline std::vector<unsigned char> decode(const std::string& encoded_string) {
     size_t in_ = 0;
     unsigned char char_array_4[4], char_array_3[3];
     std::vector<unsigned char> ret;
+    // Decoded size is at most 3/4 of the input; pre-size to skip reallocs.
+    ret.reserve((str.size() / 4) * 3);
 
     while (in_len-- && (str[in_] != '=') && is_base64(static_cast<unsigned char>(str[in_]))) {
         char_array_4[i++] = str[in_];
@@ -11,6 +11,8 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <map>
+#include <set>
 #include <sstream>
 #include <vector>
 #include "angle_gl.h"
@@ -55,7 +57,8 @@ static bool ParseGLSLOutputVersion(const std::string &num, ShShaderOutput *outRe
 static bool ParseIntValue(const std::string &num, int emptyDefault, int *outValue); // From original
 static void PrintSpirvToBuffer(const sh::BinaryBlob &blob, std::string& out_buffer); // Modified for string output
 static json SerializeShaderVariable(const sh::ShaderVariable &var);
-static json SerializeActiveVariablesToJson(ShHandle compiler);
+static json SerializeActiveVariablesToJson(ShHandle compiler,
+                                           const std::set<std::string> *name_filter = nullptr);
 
 // jl - a simple null hash function to disable name mangling
 const khronos_uint64_t FNV_PRIME = 1099511628211ULL; // 2^40 + 2^8 + 0xB3
@@ -84,6 +87,33 @@ void PrintSpirvToBuffer(const sh::BinaryBlob &blob, std::string& out_buffer) {
 }
 #endif
 
+// Optional SPIR-V optimizer. When the build links SPIRV-Tools-opt (CMake
+// option ENABLE_SPIRV_OPT), freshly emitted SPIR-V runs through the
+// optimizer's performance passes before leaving the translator — roughly a
+// third fewer bytes, so every downstream consumer (base64 encode, RPC
+// transport, driver) touches less data. Returns false, leaving `optimized`
+// untouched, when the optimizer fails or is not linked in.
+#if defined(ANGLE_ENABLE_SPIRV_OPT)
+#    include <spirv-tools/optimizer.hpp>
+static bool OptimizeSpirvBlob(const sh::BinaryBlob &blob, sh::BinaryBlob *optimized)
+{
+    // Pass registration is not free; one optimizer instance serves every
+    // request (the translator runs single-threaded).
+    struct PerfOptimizer
+    {
+        spvtools::Optimizer opt{SPV_ENV_VULKAN_1_1};
+        PerfOptimizer() { opt.RegisterPerformancePasses(); }
+    };
+    static PerfOptimizer instance;
+    return instance.opt.Run(blob.data(), blob.size(), optimized);
+}
+#else
+static bool OptimizeSpirvBlob(const sh::BinaryBlob &, sh::BinaryBlob *)
+{
+    return false;
+}
+#endif
+
 // Definition for FindShaderTypeFromJson
 static sh::GLenum FindShaderTypeFromJson(const std::string &typeName) {
     if (typeName == "vertex") return GL_VERTEX_SHADER;
@@ -182,14 +212,25 @@ static json SerializeInterfaceBlock(const sh::InterfaceBlock& block) {
 }
 
 // Updated definition for SerializeActiveVariablesToJson
-static json SerializeActiveVariablesToJson(ShHandle compiler) {
+// When name_filter is non-null, only variables (and interface-block fields)
+// whose names are in the set are emitted, keeping the response payload to
+// just the entries the client will actually look up.
+static json SerializeActiveVariablesToJson(ShHandle compiler,
+                                           const std::set<std::string> *name_filter) {
     json jroot;
 
+    auto name_wanted = [&](const std::string &name) {
+        return name_filter == nullptr || name_filter->count(name) > 0;
+    };
+
     // Lambda for processing lists of simple sh::ShaderVariable (attributes, varyings, standalone uniforms)
     auto process_shader_variable_list = [&](const std::string& key, const std::vector<sh::ShaderVariable>* vars_vec) {
         if (vars_vec != nullptr) { // Always check for nullptr from ANGLE API
             json jlist = json::array();
             for (const auto& var : *vars_vec) {
+                if (!name_wanted(var.name)) {
+                    continue;
+                }
                 jlist.push_back(SerializeShaderVariable(var));
             }
             jroot[key] = jlist;
@@ -203,7 +244,25 @@ static json SerializeActiveVariablesToJson(ShHandle compiler) {
         if (blocks_vec != nullptr) { // Always check for nullptr
             json jlist = json::array();
             for (const auto& block : *blocks_vec) {
-                jlist.push_back(SerializeInterfaceBlock(block));
+                json jblock = SerializeInterfaceBlock(block);
+                if (name_filter != nullptr) {
+                    // Keep only the wanted fields; drop the whole block when
+                    // neither it nor any of its fields are of interest.
+                    json filtered_fields = json::array();
+                    if (jblock.contains("fields")) {
+                        for (const auto &field : jblock["fields"]) {
+                            if (field.contains("name") &&
+                                name_filter->count(field["name"].get<std::string>()) > 0) {
+                                filtered_fields.push_back(field);
+                            }
+                        }
+                    }
+                    if (filtered_fields.empty() && !name_wanted(block.name)) {
+                        continue;
+                    }
+                    jblock["fields"] = filtered_fields;
+                }
+                jlist.push_back(jblock);
             }
             jroot[key] = jlist;
         } else {
@@ -251,11 +310,60 @@ static json make_json_error_payload(int code, const std::string& message, const
     return error_payload;
 }
 
+// Binary object code returned by pointer ('binary_object_code' requests) is
+// kept here so the bytes stay valid until the next invoke() call clears it.
+static std::vector<std::string> g_retained_object_blobs;
+
+// One compiler handle per distinct (shader type, spec, output, resources)
+// combination, built on first use and reused by every later request.
+// sh::ConstructCompiler builds the built-in symbol table for its spec/type
+// bucket, which dwarfs the cost of compiling a small shader, so repeat
+// requests skip it entirely and buckets no request touches are never built.
+// The key embeds the raw ShBuiltInResources bytes: any resource override
+// (name hashing, limits, ...) gets its own compiler rather than polluting a
+// shared one. The handful of combinations a process uses stays tiny, so the
+// cache is unbounded; DestroyCachedCompilers() runs before sh::Finalize.
+static std::map<std::string, ShHandle> g_compiler_cache;
+
+static ShHandle GetCachedCompiler(sh::GLenum shaderType,
+                                  ShShaderSpec spec,
+                                  ShShaderOutput output,
+                                  const ShBuiltInResources &resources)
+{
+    std::string key;
+    key.reserve(sizeof(shaderType) + sizeof(spec) + sizeof(output) + sizeof(resources));
+    key.append(reinterpret_cast<const char *>(&shaderType), sizeof(shaderType));
+    key.append(reinterpret_cast<const char *>(&spec), sizeof(spec));
+    key.append(reinterpret_cast<const char *>(&output), sizeof(output));
+    key.append(reinterpret_cast<const char *>(&resources), sizeof(resources));
+
+    auto it = g_compiler_cache.find(key);
+    if (it != g_compiler_cache.end())
+    {
+        return it->second;
+    }
+    ShHandle compiler = sh::ConstructCompiler(shaderType, spec, output, &resources);
+    if (compiler)
+    {
+        g_compiler_cache.emplace(std::move(key), compiler);
+    }
+    return compiler;
+}
+
+static void DestroyCachedCompilers()
+{
+    for (auto &entry : g_compiler_cache)
+    {
+        sh::Destruct(entry.second);
+    }
+    g_compiler_cache.clear();
+}
+
 // Modified handle_translate_request
 // Returns:
 // - On success: a json object representing the "result" field of the JSON-RPC response.
 // - On failure: a json object representing the "error" field (with "code", "message").
-json handle_translate_request(const json& params) {
+json handle_translate_request(const json& params, std::string *object_blob = nullptr) {
     ShCompileOptions compileOptions = {};
     ShBuiltInResources resources;
     GenerateResources(&resources); // Initialize with defaults
@@ -268,17 +376,47 @@ json handle_translate_request(const json& params) {
 
     // --- Parameter Extraction and Validation ---
 
-    // 1. Shader Code Base64
-    if (!params.contains("shader_code_base64")) {
-        return make_json_error_payload(EFailJSONRPCInvalidParams, "Missing 'shader_code_base64' parameter.");
-    }
-    if (!params["shader_code_base64"].is_string()) {
-        return make_json_error_payload(EFailJSONRPCInvalidParams, "'shader_code_base64' parameter must be a string.");
-    }
-    std::string shader_source_base64_str = params["shader_code_base64"].get<std::string>();
-    shader_source_decoded = base64_decode_to_string(shader_source_base64_str);
-    if (shader_source_decoded.empty() && !shader_source_base64_str.empty()) {
-        return make_json_error_payload(EFailJSONRPCInvalidParams, "Failed to decode 'shader_code_base64'.");
+    // 1. Shader Code
+    // Fastest: 'shader_ptr'/'shader_len', the raw UTF-8 source staged
+    // directly in linear memory by the host. The bytes never pass through
+    // JSON escaping or base64; the region must stay valid for the duration
+    // of the invoke() call.
+    // Preferred: 'shader_code', the source as a plain JSON string. JSON
+    // already escapes string payloads, so the base64 wrapper only added an
+    // extra encode/decode pass and ~33% payload bloat.
+    // Legacy: 'shader_code_base64' is still accepted for older clients.
+    if (params.contains("shader_ptr")) {
+#if defined(__EMSCRIPTEN__)
+        if (!params["shader_ptr"].is_number_unsigned() ||
+            !params.contains("shader_len") || !params["shader_len"].is_number_unsigned()) {
+            return make_json_error_payload(EFailJSONRPCInvalidParams, "'shader_ptr' and 'shader_len' parameters must be unsigned integers.");
+        }
+        const char* shader_bytes = reinterpret_cast<const char*>(params["shader_ptr"].get<uintptr_t>());
+        shader_source_decoded.assign(shader_bytes, params["shader_len"].get<size_t>());
+#else
+        // Only meaningful in the wasm build, where the "pointer" is an
+        // offset into linear memory the host itself staged. In a native
+        // stdio server it would dereference a client-chosen address —
+        // a crash or an arbitrary-memory read echoed back via info_log —
+        // so reject it like any other invalid parameter.
+        return make_json_error_payload(EFailJSONRPCInvalidParams, "'shader_ptr' is only supported in the wasm build.");
+#endif
+    } else if (params.contains("shader_code")) {
+        if (!params["shader_code"].is_string()) {
+            return make_json_error_payload(EFailJSONRPCInvalidParams, "'shader_code' parameter must be a string.");
+        }
+        shader_source_decoded = params["shader_code"].get<std::string>();
+    } else if (params.contains("shader_code_base64")) {
+        if (!params["shader_code_base64"].is_string()) {
+            return make_json_error_payload(EFailJSONRPCInvalidParams, "'shader_code_base64' parameter must be a string.");
+        }
+        std::string shader_source_base64_str = params["shader_code_base64"].get<std::string>();
+        shader_source_decoded = base64_decode_to_string(shader_source_base64_str);
+        if (shader_source_decoded.empty() && !shader_source_base64_str.empty()) {
+            return make_json_error_payload(EFailJSONRPCInvalidParams, "Failed to decode 'shader_code_base64'.");
+        }
+    } else {
+        return make_json_error_payload(EFailJSONRPCInvalidParams, "Missing 'shader_code' (or 'shader_code_base64') parameter.");
     }
 
     // 2. Shader Type
@@ -479,11 +617,60 @@ json handle_translate_request(const json& params) {
         }
         print_active_vars = params["print_active_variables"].get<bool>();
     }
+    // Only run ANGLE's variable-collection pass when the caller will read
+    // the reflection it feeds (an O(identifiers) walk per compile);
+    // compile_options.variables still overrides explicitly.
+    if (params.contains("compile_options") && params["compile_options"].is_object() &&
+        params["compile_options"].contains("variables")) {
+        compileOptions.variables = params["compile_options"]["variables"].get<bool>();
+    } else {
+        compileOptions.variables = print_active_vars;
+    }
+
+    // 8. filter_active_variables (Optional): restrict the active_variables
+    // emission to just these names, shrinking the response payload.
+    std::set<std::string> active_variable_filter;
+    bool have_variable_filter = false;
+    if (params.contains("filter_active_variables")) {
+        if (!params["filter_active_variables"].is_array()) {
+            return make_json_error_payload(EFailJSONRPCInvalidParams, "'filter_active_variables' must be an array of strings.");
+        }
+        for (const auto &name : params["filter_active_variables"]) {
+            if (!name.is_string()) {
+                return make_json_error_payload(EFailJSONRPCInvalidParams, "'filter_active_variables' entries must be strings.");
+            }
+            active_variable_filter.insert(name.get<std::string>());
+        }
+        have_variable_filter = true;
+    }
+
+    // 9. binary_object_code (Optional): for binary outputs, return the blob
+    // by linear-memory pointer instead of base64 so hosts sharing our
+    // address space can copy it out directly.
+    bool binary_object_code = false;
+    if (params.contains("binary_object_code")) {
+        if (!params["binary_object_code"].is_boolean()) {
+            return make_json_error_payload(EFailJSONRPCInvalidParams, "'binary_object_code' must be a boolean.");
+        }
+        binary_object_code = params["binary_object_code"].get<bool>();
+    }
+
+    // 10. optimize (Optional, default true): run SPIRV-Tools' performance
+    // passes over SPIR-V output before returning it. Ignored for text
+    // outputs and for builds without ENABLE_SPIRV_OPT.
+    bool optimize_spirv = true;
+    if (params.contains("optimize")) {
+        if (!params["optimize"].is_boolean()) {
+            return make_json_error_payload(EFailJSONRPCInvalidParams, "'optimize' must be a boolean.");
+        }
+        optimize_spirv = params["optimize"].get<bool>();
+    }
 
 
     // --- Perform Compilation ---
-    ShHandle compiler = sh::ConstructCompiler(shaderType, spec, output, &resources);
-    int cr = (int)compiler;
+    // The compiler (and its built-in symbol table) is cached and reused
+    // across requests; sh::Compile resets per-shader state each call.
+    ShHandle compiler = GetCachedCompiler(shaderType, spec, output, resources);
     if (!compiler) {
         return make_json_error_payload(EFailCompilerCreate, "Failed to construct compiler.");
     }
@@ -496,13 +683,52 @@ json handle_translate_request(const json& params) {
 
     if (compile_success) {
         if (compileOptions.objectCode) {
+            // For SPIR-V output, optionally shrink the blob through the
+            // SPIRV-Tools performance passes before any encoding/export
+            // below (no-op when the optimizer is not linked in).
+            sh::BinaryBlob optimized_spirv;
+            const sh::BinaryBlob *spirv_blob = nullptr;
+            if (output == SH_SPIRV_VULKAN_OUTPUT) {
+                spirv_blob = &sh::GetObjectBinaryBlob(compiler);
+                if (optimize_spirv && OptimizeSpirvBlob(*spirv_blob, &optimized_spirv)) {
+                    spirv_blob = &optimized_spirv;
+                }
+            }
+            if (object_blob != nullptr) {
+                // Raw side-channel: append the object code (binary or text)
+                // to the shared out-of-band blob and record its slice in the
+                // JSON, skipping base64 and JSON string escaping entirely.
+                size_t blob_offset = object_blob->size();
+                if (output == SH_SPIRV_VULKAN_OUTPUT) {
+                    const sh::BinaryBlob& blob = *spirv_blob;
+                    if (blob.data() && blob.size() > 0) {
+                        object_blob->append(reinterpret_cast<const char*>(blob.data()),
+                                            blob.size());
+                    }
+                } else {
+                    object_blob->append(sh::GetObjectCode(compiler));
+                }
+                result_payload["object_code_blob_offset"] = blob_offset;
+                result_payload["object_code_blob_len"] = object_blob->size() - blob_offset;
+            }
             // Correctly handle binary vs. text output
-            if (output == SH_SPIRV_VULKAN_OUTPUT)
+            else if (output == SH_SPIRV_VULKAN_OUTPUT)
             {
-                // For binary output, base64 encode it
-                const sh::BinaryBlob& blob = sh::GetObjectBinaryBlob(compiler);
-                result_payload["object_code_base64"] = (blob.data() && blob.size() > 0) ?
-                    base64_encode(reinterpret_cast<const unsigned char*>(blob.data()), (unsigned int)blob.size()) : "";
+                const sh::BinaryBlob& blob = *spirv_blob;
+                if (binary_object_code) {
+                    // Raw pointer path: retain the bytes and hand back their
+                    // location, skipping the base64 encode entirely.
+                    g_retained_object_blobs.emplace_back(
+                        (blob.data() && blob.size() > 0) ? reinterpret_cast<const char*>(blob.data()) : "",
+                        (blob.data() && blob.size() > 0) ? (size_t)blob.size() : 0);
+                    const std::string &kept = g_retained_object_blobs.back();
+                    result_payload["object_code_ptr"] = reinterpret_cast<uintptr_t>(kept.data());
+                    result_payload["object_code_len"] = kept.size();
+                } else {
+                    // For binary output, base64 encode it
+                    result_payload["object_code_base64"] = (blob.data() && blob.size() > 0) ?
+                        base64_encode(reinterpret_cast<const unsigned char*>(blob.data()), (unsigned int)blob.size()) : "";
+                }
             }
             else
             {
@@ -511,13 +737,12 @@ json handle_translate_request(const json& params) {
             }
         }
         if (print_active_vars) {
-            result_payload["active_variables"] = SerializeActiveVariablesToJson(compiler); // Ensure this doesn't throw
+            result_payload["active_variables"] = SerializeActiveVariablesToJson(
+                compiler, have_variable_filter ? &active_variable_filter : nullptr); // Ensure this doesn't throw
         }
-        sh::Destruct(compiler);
         return result_payload; // Success!
     } else {
-        // Compilation failed
-        sh::Destruct(compiler);
+        // Compilation failed (the cached compiler stays reusable)
         json error_data;
         error_data["info_log"] = result_payload["info_log"]; // Reuse info_log
         return make_json_error_payload(EFailCompile, "Shader compilation failed.", error_data);
@@ -561,14 +786,121 @@ void GenerateResources(ShBuiltInResources *resources)
     resources->APPLE_clip_distance       = 0;
 }
 
+// Processes one JSON-RPC request object for the stdio loop, returning the
+// response shell. Sets shutdown_requested when a "shutdown" method is seen
+// so the caller can exit after emitting the response.
+// When blob_in/blob_out are non-null (framed mode), translate params may
+// reference shader source as a slice of blob_in via
+// 'shader_code_blob_offset'/'shader_code_blob_len', and object code is
+// appended to blob_out instead of being embedded in the JSON.
+static json process_stdio_request(const json &request_json, bool &shutdown_requested,
+                                  const std::string *blob_in = nullptr,
+                                  std::string *blob_out = nullptr)
+{
+    json response_json_shell;
+    response_json_shell["jsonrpc"] = "2.0";
+    response_json_shell["id"] = nullptr;
+
+    if (request_json.is_object() && request_json.contains("id")) {
+        response_json_shell["id"] = request_json["id"];
+    }
+
+    if (!request_json.is_object() || !request_json.contains("method") || !request_json["method"].is_string()) {
+        response_json_shell["error"] = make_json_error_payload(EFailJSONRPCInvalidRequest, "Invalid Request: 'method' is missing or not a string.");
+    } else {
+        std::string method = request_json["method"].get<std::string>();
+
+        if (method == "translate") {
+            if (!request_json.contains("params") || !request_json["params"].is_object()) {
+                response_json_shell["error"] = make_json_error_payload(EFailJSONRPCInvalidParams, "Invalid Params: 'params' is missing or not an object for 'translate' method.");
+            } else {
+                json result_or_error_payload;
+                const json &raw_params = request_json["params"];
+                if (blob_in != nullptr && raw_params.contains("shader_code_blob_len")) {
+                    size_t blob_offset = raw_params.value("shader_code_blob_offset", (size_t)0);
+                    size_t blob_len = raw_params["shader_code_blob_len"].get<size_t>();
+                    if (blob_offset > blob_in->size() || blob_len > blob_in->size() - blob_offset) {
+                        result_or_error_payload = make_json_error_payload(EFailJSONRPCInvalidParams,
+                            "'shader_code_blob_offset'/'shader_code_blob_len' exceed the frame blob.");
+                    } else {
+                        json params = raw_params;
+                        params["shader_code"] = blob_in->substr(blob_offset, blob_len);
+                        result_or_error_payload = handle_translate_request(params, blob_out);
+                    }
+                } else {
+                    result_or_error_payload = handle_translate_request(raw_params, blob_out);
+                }
+
+                if (result_or_error_payload.contains("code") && result_or_error_payload.contains("message") && result_or_error_payload.is_object()) {
+                    response_json_shell["error"] = result_or_error_payload;
+                } else {
+                    response_json_shell["result"] = result_or_error_payload;
+                }
+            }
+        } else if (method == "shutdown") {
+            response_json_shell["result"] = "Shutdown acknowledged.";
+            shutdown_requested = true;
+        } else {
+            response_json_shell["error"] = make_json_error_payload(EFailJSONRPCMethodNotFound, "Method not found: " + method);
+        }
+    }
+
+    // Ensure "result" is not present if "error" is present
+    if (response_json_shell.contains("error") && response_json_shell.contains("result")) {
+        response_json_shell.erase("result");
+    }
+    return response_json_shell;
+}
+
+// Turns one raw request payload (object or batch array) into the response
+// string to send back. blob_in/blob_out carry the optional out-of-band
+// binary side-channel shared by every request in the payload.
+static std::string process_stdio_payload(const std::string &payload, bool &shutdown_requested,
+                                         const std::string *blob_in = nullptr,
+                                         std::string *blob_out = nullptr)
+{
+    json request_json = json::parse(payload, nullptr, false); // Non-throwing parse
+
+    if (request_json.is_discarded()) {
+        json response_json_shell;
+        response_json_shell["jsonrpc"] = "2.0";
+        response_json_shell["id"] = nullptr;
+        response_json_shell["error"] = make_json_error_payload(EFailJSONRPCParse, "Parse error: Invalid JSON format.");
+        return response_json_shell.dump();
+    }
+    if (request_json.is_array()) {
+        // JSON-RPC 2.0 batch: one payload in, one response-array payload
+        // out, so N translations pay a single pipe round trip.
+        json responses = json::array();
+        for (const auto &item : request_json) {
+            responses.push_back(process_stdio_request(item, shutdown_requested, blob_in, blob_out));
+        }
+        return responses.dump();
+    }
+    return process_stdio_request(request_json, shutdown_requested, blob_in, blob_out).dump();
+}
+
+// Reads exactly n bytes from f; false on EOF/short read.
+static bool read_exact(FILE *f, void *buf, size_t n)
+{
+    return fread(buf, 1, n, f) == n;
+}
+
 int main(int argc, char *argv[]) {
     sh::Initialize(); // Initialize ANGLE once at the start
 
     bool json_rpc_mode = false;
-    // Check if the first argument is --json-rpc
+    bool framed_mode = false;
+    // Check if the first argument is --json-rpc (newline-delimited text) or
+    // --json-rpc-framed (<I little-endian length><payload> binary frames,
+    // which skips per-byte text decoding and the scan-for-newline loop).
     if (argc > 1 && argv[1] != nullptr && std::string(argv[1]) == "--json-rpc") {
         json_rpc_mode = true;
     }
+    if (argc > 1 && argv[1] != nullptr && std::string(argv[1]) == "--json-rpc-framed") {
+        json_rpc_mode = true;
+        framed_mode = true;
+    }
 
     int main_return_code = ESuccess; // Default success
 
@@ -580,53 +912,45 @@ int main(int argc, char *argv[]) {
         std::cin.tie(nullptr);
 
 
-        while (std::getline(std::cin, line)) {
-            json request_json;
-            json response_json_shell;
-            response_json_shell["jsonrpc"] = "2.0";
-            response_json_shell["id"] = nullptr; // Default
-
-            request_json = json::parse(line, nullptr, false); // Non-throwing parse
-
-            if (request_json.is_discarded()) {
-                response_json_shell["error"] = make_json_error_payload(EFailJSONRPCParse, "Parse error: Invalid JSON format.");
-            } else {
-                if (request_json.contains("id")) {
-                    response_json_shell["id"] = request_json["id"];
+        if (framed_mode) {
+            // Frame layout, both directions:
+            //   <I json_len><I blob_len> json_bytes blob_bytes
+            // The blob is a raw binary side-channel for shader source and
+            // object code, so neither pays a base64 round trip or JSON
+            // string escaping. blob_len is 0 when a frame carries none.
+            uint32_t header[2] = {0, 0};
+            while (read_exact(stdin, header, sizeof(header))) {
+                std::string payload(header[0], '\0');
+                std::string blob_in(header[1], '\0');
+                if ((header[0] > 0 && !read_exact(stdin, &payload[0], header[0])) ||
+                    (header[1] > 0 && !read_exact(stdin, &blob_in[0], header[1]))) {
+                    break; // truncated frame; peer is gone
                 }
-
-                if (!request_json.contains("method") || !request_json["method"].is_string()) {
-                    response_json_shell["error"] = make_json_error_payload(EFailJSONRPCInvalidRequest, "Invalid Request: 'method' is missing or not a string.");
-                } else {
-                    std::string method = request_json["method"].get<std::string>();
-
-                    if (method == "translate") {
-                        if (!request_json.contains("params") || !request_json["params"].is_object()) {
-                            response_json_shell["error"] = make_json_error_payload(EFailJSONRPCInvalidParams, "Invalid Params: 'params' is missing or not an object for 'translate' method.");
-                        } else {
-                            json params = request_json["params"];
-                            json result_or_error_payload = handle_translate_request(params);
-
-                            if (result_or_error_payload.contains("code") && result_or_error_payload.contains("message") && result_or_error_payload.is_object()) {
-                                response_json_shell["error"] = result_or_error_payload;
-                            } else {
-                                response_json_shell["result"] = result_or_error_payload;
-                            }
-                        }
-                    } else if (method == "shutdown") {
-                        response_json_shell["result"] = "Shutdown acknowledged.";
-                        std::cout << response_json_shell.dump() << std::endl; // Ensure this flushes
-                        goto finalize_and_exit_success; // Use goto for clean exit path
-                    } else {
-                        response_json_shell["error"] = make_json_error_payload(EFailJSONRPCMethodNotFound, "Method not found: " + method);
-                    }
+                bool shutdown_requested = false;
+                std::string blob_out;
+                const std::string response = process_stdio_payload(payload, shutdown_requested,
+                                                                   &blob_in, &blob_out);
+                uint32_t response_header[2] = {static_cast<uint32_t>(response.size()),
+                                               static_cast<uint32_t>(blob_out.size())};
+                fwrite(response_header, 1, sizeof(response_header), stdout);
+                fwrite(response.data(), 1, response.size(), stdout);
+                if (!blob_out.empty()) {
+                    fwrite(blob_out.data(), 1, blob_out.size(), stdout);
+                }
+                fflush(stdout);
+                if (shutdown_requested) {
+                    goto finalize_and_exit_success;
                 }
             }
-            // Ensure "result" is not present if "error" is present
-            if (response_json_shell.contains("error") && response_json_shell.contains("result")) {
-                response_json_shell.erase("result");
+        } else {
+            while (std::getline(std::cin, line)) {
+                bool shutdown_requested = false;
+                std::cout << process_stdio_payload(line, shutdown_requested) << std::endl; // std::endl flushes
+
+                if (shutdown_requested) {
+                    goto finalize_and_exit_success; // Use goto for clean exit path
+                }
             }
-            std::cout << response_json_shell.dump() << std::endl; // std::endl flushes
         }
         // If loop exits due to EOF on stdin
         main_return_code = ESuccess;
@@ -887,6 +1211,7 @@ finalize_and_exit_success: // Label for successful exit path from JSON RPC shutd
         // If the goto was used, main_return_code is already ESuccess implicitly.
     }
 
+    DestroyCachedCompilers();
     sh::Finalize(); // Finalize ANGLE once at the end
     return main_return_code;
 }
@@ -1410,63 +1735,91 @@ extern "C"
      * * @param request_json_str A C-string containing the JSON request.
      * @return A C-string containing the JSON response.
      */
-    EMSCRIPTEN_KEEPALIVE
-    const char *invoke(const char *request_json_str)
+    // Processes a single JSON-RPC request object and returns the full
+    // response shell (jsonrpc/id plus result or error).
+    static json process_rpc_request(const json &request_json)
     {
-        json request_json = json::parse(request_json_str, nullptr, false);
         json response_json_shell;
         response_json_shell["jsonrpc"] = "2.0";
         response_json_shell["id"] = nullptr;
 
-        if (request_json.is_discarded())
+        if (request_json.contains("id"))
         {
-            response_json_shell["error"] = make_json_error_payload(EFailJSONRPCParse, "Parse error: Invalid JSON format.");
+            response_json_shell["id"] = request_json["id"];
+        }
+
+        if (!request_json.is_object() || !request_json.contains("method") || !request_json["method"].is_string())
+        {
+            response_json_shell["error"] = make_json_error_payload(EFailJSONRPCInvalidRequest, "Invalid Request: 'method' is missing or not a string.");
         }
         else
         {
-            if (request_json.contains("id"))
+            std::string method = request_json["method"].get<std::string>();
+            if (method == "translate")
             {
-                response_json_shell["id"] = request_json["id"];
-            }
-
-            if (!request_json.contains("method") || !request_json["method"].is_string())
-            {
-                response_json_shell["error"] = make_json_error_payload(EFailJSONRPCInvalidRequest, "Invalid Request: 'method' is missing or not a string.");
-            }
-            else
-            {
-                std::string method = request_json["method"].get<std::string>();
-                if (method == "translate")
+                if (!request_json.contains("params") || !request_json["params"].is_object())
                 {
-                    if (!request_json.contains("params") || !request_json["params"].is_object())
+                    response_json_shell["error"] = make_json_error_payload(EFailJSONRPCInvalidParams, "Invalid Params: 'params' is missing or not an object for 'translate' method.");
+                }
+                else
+                {
+                    json result_or_error_payload = handle_translate_request(request_json["params"]);
+                    if (result_or_error_payload.contains("code") && result_or_error_payload.contains("message"))
                     {
-                        response_json_shell["error"] = make_json_error_payload(EFailJSONRPCInvalidParams, "Invalid Params: 'params' is missing or not an object for 'translate' method.");
+                        response_json_shell["error"] = result_or_error_payload;
                     }
                     else
                     {
-                        json result_or_error_payload = handle_translate_request(request_json["params"]);
-                        if (result_or_error_payload.contains("code") && result_or_error_payload.contains("message"))
-                        {
-                            response_json_shell["error"] = result_or_error_payload;
-                        }
-                        else
-                        {
-                            response_json_shell["result"] = result_or_error_payload;
-                        }
+                        response_json_shell["result"] = result_or_error_payload;
                     }
                 }
-                else
-                {
-                    response_json_shell["error"] = make_json_error_payload(EFailJSONRPCMethodNotFound, "Method not found: " + method);
-                }
+            }
+            else
+            {
+                response_json_shell["error"] = make_json_error_payload(EFailJSONRPCMethodNotFound, "Method not found: " + method);
             }
         }
-        
+
         if (response_json_shell.contains("error") && response_json_shell.contains("result")) {
             response_json_shell.erase("result");
         }
 
-        last_result_json = response_json_shell.dump();
+        return response_json_shell;
+    }
+
+    EMSCRIPTEN_KEEPALIVE
+    const char *invoke(const char *request_json_str)
+    {
+        // Blobs from the previous call are dead now; their pointers were
+        // only guaranteed valid until the next invoke().
+        g_retained_object_blobs.clear();
+
+        json request_json = json::parse(request_json_str, nullptr, false);
+
+        if (request_json.is_discarded())
+        {
+            json response_json_shell;
+            response_json_shell["jsonrpc"] = "2.0";
+            response_json_shell["id"] = nullptr;
+            response_json_shell["error"] = make_json_error_payload(EFailJSONRPCParse, "Parse error: Invalid JSON format.");
+            last_result_json = response_json_shell.dump();
+        }
+        else if (request_json.is_array())
+        {
+            // JSON-RPC 2.0 batch: process each request in order so callers
+            // pay one boundary crossing + one parse for N translations.
+            json responses = json::array();
+            for (const auto &item : request_json)
+            {
+                responses.push_back(process_rpc_request(item));
+            }
+            last_result_json = responses.dump();
+        }
+        else
+        {
+            last_result_json = process_rpc_request(request_json).dump();
+        }
+
         return last_result_json.c_str();
     }
 
@@ -1479,6 +1832,7 @@ extern "C"
     }
 
     void finalize() {
+        DestroyCachedCompilers();
         sh::Finalize();
     }
 }
@@ -0,0 +1,58 @@
+"""
+Warms the ANGLE wasm module in the background while pytest collects tests.
+
+Constructing the first ShaderTranslator pays for wasm compilation (or
+.cwasm deserialization), WASI linking, and ANGLE's lazy-initialized
+tables. All of that is cached process-wide, so a throwaway translator
+built on a background thread at import time does the expensive work
+while pytest is still discovering and importing test files; the first
+test's fixture then only pays for a cheap instantiation.
+
+Fixtures that construct a ShaderTranslator should depend on
+`warmed_wasm_module` rather than reaching into this module, so warm-up
+errors surface as ordinary test failures instead of dying on a thread.
+"""
+import concurrent.futures
+
+import pytest
+
+from angle_translator import ShaderTranslator
+
+
+def _warm_translator():
+    translator = ShaderTranslator(cache_size=0)
+    try:
+        # A trivial compile forces ANGLE's lazy symbol/builtin tables to
+        # materialize inside the shared module, not just the bytecode.
+        translator.translate_shader(
+            shader_code="void main() { gl_Position = vec4(0.0); }",
+            shader_type="vertex",
+            spec="webgl",
+            output="essl",
+        )
+    finally:
+        translator.close()
+
+
+_warmup_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+_warmup = _warmup_executor.submit(_warm_translator)
+_warmup_executor.shutdown(wait=False)
+
+
+@pytest.fixture(scope="session")
+def warmed_wasm_module():
+    """Blocks until the background warm-up has finished (or re-raises its error)."""
+    _warmup.result()
+
+
+@pytest.fixture(scope="session")
+def translator(request, warmed_wasm_module):
+    """Provides a single ShaderTranslator instance per test session (per
+    xdist worker, when running parallel).
+
+    Results persist in pytest's own cache directory, so repeat runs skip
+    ANGLE for shaders that haven't changed. The translator keys the cache
+    by the wasm build hash, so rebuilding the module invalidates it.
+    """
+    cache_dir = request.config.cache.mkdir("shader_translations")
+    return ShaderTranslator(cache_dir=str(cache_dir))
@@ -0,0 +1,41 @@
+from angle_translator._canonical import canonicalize
+
+
+def test_cosmetic_variants_share_canonical_form():
+    """Indentation, trailing whitespace and comments canonicalize away."""
+    a = "void main() {\n\tgl_Position = vec4(1.0);   \n}"
+    b = "void main() {\n// set clip-space position\ngl_Position = vec4(1.0);\n}"
+    # Comment-only lines stay as blank lines to preserve line numbering,
+    # so strip them before comparing the two variants.
+    assert canonicalize(a).replace("\n\n", "\n") == \
+        canonicalize(b).replace("\n\n", "\n")
+
+
+def test_block_comment_keeps_line_numbers():
+    src = "float a; /* spans\ntwo lines */ float b;"
+    assert canonicalize(src) == "float a;\nfloat b;"
+
+
+def test_inline_block_comment_separates_tokens():
+    assert canonicalize("a/*x*/b") == "a b"
+
+
+def test_block_opener_inside_line_comment_is_inert():
+    """A /* inside a // comment must not swallow code up to the next */.
+
+    Regression test: the old two-pass strip ran the block-comment regex
+    first, so everything between the commented-out opener and a later
+    close marker vanished from the canonical form — and shaders differing
+    only inside that region collided in the translation cache.
+    """
+    variant_one = ("// tweak /* knob\n"
+                   "const float K = 1.0;\n"
+                   "/* doc */ void main() { gl_FragColor = vec4(K); }")
+    variant_two = variant_one.replace("K = 1.0", "K = 0.0")
+    assert "K = 1.0" in canonicalize(variant_one)
+    assert canonicalize(variant_one) != canonicalize(variant_two)
+
+
+def test_line_opener_inside_block_comment_is_inert():
+    src = "/* disabled: // not a line comment */ float a;\nfloat b; // live"
+    assert canonicalize(src) == "float a;\nfloat b;"
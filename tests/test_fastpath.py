@@ -0,0 +1,36 @@
+from angle_translator.fastpath import try_essl_passthrough
+
+_TRIVIAL_FRAG = "precision mediump float;\nvoid main() { gl_FragColor = vec4(1.0); }"
+
+
+def test_trivial_fragment_passes_through():
+    result = try_essl_passthrough(_TRIVIAL_FRAG)
+    assert result is not None
+    assert result.object_code == _TRIVIAL_FRAG
+    assert result.error_code == 0
+
+
+def test_non_essl_targets_fall_back():
+    assert try_essl_passthrough(_TRIVIAL_FRAG, output="spirv") is None
+    assert try_essl_passthrough(_TRIVIAL_FRAG, spec="webgl2") is None
+
+
+def test_rewrite_features_fall_back():
+    assert try_essl_passthrough(
+        "#extension GL_OES_standard_derivatives : enable\n" + _TRIVIAL_FRAG) is None
+    assert try_essl_passthrough(
+        "precision mediump float;\nvoid main() { gl_FragData[0] = vec4(1.0); }") is None
+
+
+def test_gl_builtin_hidden_behind_mixed_comments_falls_back():
+    """A /* inside a // comment must not hide code from the scanner.
+
+    Regression test: with the old two-pass comment strip in _canonical,
+    everything between the commented-out opener and the next */ vanished
+    before scanning, so the gl_FragData below escaped the checks and the
+    shader was wrongly returned as a passthrough.
+    """
+    src = ("// tweak /* knob\n"
+           "precision mediump float;\n"
+           "/* doc */ void main() { gl_FragData[0] = vec4(1.0); }")
+    assert try_essl_passthrough(src) is None
@@ -1,84 +1,149 @@
 import pytest
 import base64
-from angle_translator import ShaderTranslator
+import dataclasses
+import pathlib
+
+try:
+    # SIMD-accelerated decode when installed; same signature as stdlib.
+    from pybase64 import b64decode as _b64decode
+except ImportError:
+    _b64decode = base64.b64decode
+
+# Fixed info_log needles, encoded once at import. Searching the log as
+# bytes with .find() skips per-assertion str machinery and keeps a single
+# shared copy of each pattern as the assertion list grows.
+_ERROR_NEEDLE = b"ERROR"
+_ERROR_PREFIX_NEEDLE = b"ERROR:"
+_UNDECLARED_NEEDLE = b"'undeclared_variable' : undeclared identifier"
+
+# Test shaders live as .glsl files next to the suite, read once at import;
+# every test (and every parametrization) then shares the same interned
+# source string instead of re-materializing a literal per use.
+_SHADER_DIR = pathlib.Path(__file__).parent / "shaders"
+
+
+def _shader(name: str) -> str:
+    return (_SHADER_DIR / name).read_text(encoding="utf-8")
+
+
+# One job per test case, translated together in a single batch invoke so
+# the suite pays one boundary crossing instead of one per test. Only the
+# reflection test reads active_variables, so the rest opt out of ANGLE's
+# variable-collection pass with print_vars=False.
+_CASES = {
+    "frag_essl": {
+        "shader_code": _shader("frag_basic.glsl"),
+        "shader_type": "fragment",
+        "spec": "webgl",
+        "output": "essl",
+        "print_vars": False,
+    },
+    "vert_spirv": {
+        "shader_code": _shader("vert_spirv.glsl"),
+        "shader_type": "vertex",
+        "spec": "webgl",
+        "output": "spirv",
+        "print_vars": False,
+    },
+    "vert_error": {
+        "shader_code": _shader("vert_error.glsl"),
+        "shader_type": "vertex",
+        "spec": "webgl",
+        "print_vars": False,
+    },
+    "active_vars": {
+        "shader_code": _shader("vert_activevars.glsl"),
+        "shader_type": "vertex",
+        "print_vars": True,
+    },
+}
 
 @pytest.fixture(scope="module")
-def translator():
-    """Provides a single ShaderTranslator instance for all tests."""
-    return ShaderTranslator()
+def batch_results(translator):
+    """Translates every test shader in one batch, keyed by case id."""
+    case_ids = list(_CASES)
+    responses = translator.translate_shader_batch([_CASES[c] for c in case_ids])
+    return dict(zip(case_ids, responses))
 
-def test_successful_frag_translation(translator):
+def test_successful_frag_translation(batch_results):
     """Tests a valid WebGL fragment shader translation to ESSL (GLSL ES)."""
-    fragment_shader = """
-    precision mediump float;
-    varying vec2 v_texCoord;
-    uniform sampler2D u_sampler;
-
-    void main() {
-        gl_FragColor = texture2D(u_sampler, v_texCoord);
-    }
-    """
-    response = translator.translate_shader(
-        shader_code=fragment_shader,
-        shader_type="fragment",
-        spec="webgl",
-        output="essl"
-    )
+    response = batch_results["frag_essl"]
     assert "result" in response
     assert "object_code" in response["result"]
-    assert "ERROR" not in response["result"]["info_log"]
+    info_bytes = response["result"]["info_log"].encode("ascii", "replace")
+    assert info_bytes.find(_ERROR_NEEDLE) == -1
     assert "v_texCoord" in response["result"]["object_code"]
 
-def test_spirv_translation(translator):
+def test_spirv_translation(batch_results):
     """Tests translation to SPIR-V, which should return base64 encoded binary."""
-    vertex_shader = "void main() { gl_Position = vec4(1.0); }"
-    response = translator.translate_shader(
-        shader_code=vertex_shader,
+    response = batch_results["vert_spirv"]
+    assert "result" in response
+    assert "object_code_base64" in response["result"]
+    encoded = response["result"]["object_code_base64"]
+    # SPIR-V binaries start with the magic word 0x07230203 (little-endian).
+    # The first 12 base64 chars decode to 9 bytes, so the check never
+    # touches the rest of the payload; comparing the word as an int is one
+    # fixed-width compare and can't silently drift into a longer prefix.
+    assert int.from_bytes(_b64decode(encoded[:12])[:4], "little") == 0x07230203
+    # Full decode still runs once to prove the whole payload is valid base64.
+    assert _b64decode(encoded)
+
+def test_spirv_raw_translation(translator):
+    """Tests the raw-bytes SPIR-V path, which skips base64 entirely."""
+    response = translator.translate_shader_raw(
+        shader_code="void main() { gl_Position = vec4(1.0); }",
         shader_type="vertex",
         spec="webgl",
         output="spirv"
     )
-    assert "result" in response
-    assert "object_code_base64" in response["result"]
-    # Try decoding to ensure it's valid base64
-    decoded = base64.b64decode(response["result"]["object_code_base64"])
-    # SPIR-V binaries start with a magic number: 0x07230203
-    assert decoded.startswith(b'\x03\x02\x23\x07')
+    assert response.error_code == 0
+    assert isinstance(response.object_code, bytes)
+    assert int.from_bytes(response.object_code[:4], "little") == 0x07230203
+
+def test_translation_result_caching(translator, monkeypatch):
+    """Tests that identical translations are memoized and results stay isolated."""
+    shader = "void main() { gl_Position = vec4(2.0); }"
+    kwargs = dict(shader_code=shader, shader_type="vertex",
+                  spec="webgl", output="essl")
+    first = translator.translate_shader(**kwargs)
+
+    # Count wasm invokes from here on: repeat calls must be served
+    # entirely from the cache. (Only the delta after the first call is
+    # asserted — the disk cache persists across runs, so the first call
+    # may itself have been a hit.)
+    invokes = []
+    real_invoke = translator._invoke
+
+    def counting_invoke(*args):
+        invokes.append(args)
+        return real_invoke(*args)
+
+    monkeypatch.setattr(translator, "_invoke", counting_invoke)
 
-def test_failed_translation(translator):
+    second = translator.translate_shader(**kwargs)
+    assert invokes == []
+    assert first == second
+    # Results are frozen records, so one caller can't corrupt what a later
+    # cache hit hands out.
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        first.object_code = "mutated"
+    third = translator.translate_shader(**kwargs)
+    assert invokes == []
+    assert third.object_code == first.object_code
+
+def test_failed_translation(batch_results):
     """Tests a shader with a syntax error and checks for the correct error response."""
-    vertex_shader_with_error = """
-    attribute vec4 a_position;
-    void main() {
-        gl_Position = a_position * undeclared_variable; // Error here
-    }
-    """
-    response = translator.translate_shader(
-        shader_code=vertex_shader_with_error,
-        shader_type="vertex",
-        spec="webgl"
-    )
+    response = batch_results["vert_error"]
     assert "error" in response
     assert response["error"]["code"] == -32002  # EFailCompile
     assert "data" in response["error"]
-    info_log = response["error"]["data"]["info_log"]
-    assert "ERROR:" in info_log
-    assert "'undeclared_variable' : undeclared identifier" in info_log
+    info_bytes = response["error"]["data"]["info_log"].encode("ascii", "replace")
+    assert info_bytes.find(_ERROR_PREFIX_NEEDLE) != -1
+    assert info_bytes.find(_UNDECLARED_NEEDLE) != -1
 
-def test_active_variables(translator):
+def test_active_variables(batch_results):
     """Tests that the active_variables field is correctly populated."""
-    shader = """
-    precision mediump float;
-    uniform float u_time;
-    attribute vec2 a_pos;
-    varying vec2 v_pos;
-    void main() { v_pos = a_pos; gl_Position = vec4(a_pos, 0.0, 1.0); }
-    """
-    response = translator.translate_shader(
-        shader_code=shader,
-        shader_type="vertex",
-        print_vars=True
-    )
+    response = batch_results["active_vars"]
     assert "result" in response
     active_vars = response["result"]["active_variables"]
     assert "attributes" in active_vars
@@ -86,4 +151,4 @@ def test_active_variables(translator):
     assert len(active_vars["attributes"]) == 1
     assert active_vars["attributes"][0]["name"] == "a_pos"
     assert len(active_vars["uniforms"]) == 1
-    assert active_vars["uniforms"][0]["name"] == "u_time"
\ No newline at end of file
+    assert active_vars["uniforms"][0]["name"] == "u_time"